@@ -0,0 +1,48 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.database import engine, Base
+from app import models  # noqa: F401  Registra os modelos no metadata
+from app import search_index
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """ Ignora no autogenerate a coluna gerada da busca textual (não mapeada no ORM). """
+    if type_ == "column" and name == search_index.SEARCH_VECTOR_COLUMN:
+        return False
+    return True
+
+
+def run_migrations_offline() -> None:
+    """ Gera o SQL das migrações sem conectar ao banco (alembic upgrade --sql). """
+    context.configure(
+        url=str(engine.url),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """ Aplica as migrações usando o mesmo engine da aplicação (DATABASE_URL). """
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,81 @@
+"""Esquema inicial (organizations, users, products, orders, order_items)
+
+Bancos criados antes do Alembic (via Base.metadata.create_all) já possuem
+estas tabelas: marque-os com `alembic stamp 0001` antes do `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "organizations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=True),
+    )
+    op.create_index("ix_organizations_id", "organizations", ["id"])
+    op.create_index("ix_organizations_name", "organizations", ["name"], unique=True)
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("organization_id", sa.Integer(), sa.ForeignKey("organizations.id"), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "products",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("price", sa.Numeric(10, 2), nullable=False),
+        sa.Column("category", sa.String(), nullable=True),
+        sa.Column("image_url", sa.String(), nullable=True),
+        sa.Column("stock_qty", sa.Integer(), nullable=False),
+        sa.Column("weight_grams", sa.Integer(), nullable=False),
+        sa.Column("organization_id", sa.Integer(), sa.ForeignKey("organizations.id"), nullable=True),
+    )
+    op.create_index("ix_products_id", "products", ["id"])
+    op.create_index("ix_products_name", "products", ["name"])
+    op.create_index("ix_products_category", "products", ["category"])
+
+    op.create_table(
+        "orders",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_orders_id", "orders", ["id"])
+
+    op.create_table(
+        "order_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("order_id", sa.Integer(), sa.ForeignKey("orders.id"), nullable=True),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), nullable=True),
+        sa.Column("quantity", sa.Integer(), nullable=True),
+        sa.Column("price_at_purchase", sa.Numeric(10, 2), nullable=True),
+        sa.Column("organization_id", sa.Integer(), sa.ForeignKey("organizations.id"), nullable=True),
+    )
+    op.create_index("ix_order_items_id", "order_items", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("order_items")
+    op.drop_table("orders")
+    op.drop_table("products")
+    op.drop_table("users")
+    op.drop_table("organizations")
@@ -0,0 +1,42 @@
+"""Busca textual de produtos (coluna tsvector em português sem acentos + trigram em category)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+from app import search_index
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return  # Outros bancos continuam usando ILIKE
+
+    for statement in search_index.SETUP_STATEMENTS:
+        op.execute(statement)
+    for statement in search_index.COLUMN_STATEMENTS:
+        op.execute(statement)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_products_category_trgm ON products "
+        f"USING gin ({search_index.PRODUCT_CATEGORY_SQL} gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_products_category_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_products_search_vector")
+    op.execute(f"ALTER TABLE products DROP COLUMN IF EXISTS {search_index.SEARCH_VECTOR_COLUMN}")
+    for statement in search_index.TEARDOWN_STATEMENTS:
+        op.execute(statement)
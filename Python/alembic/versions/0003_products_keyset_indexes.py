@@ -0,0 +1,25 @@
+"""Índices compostos para paginação por cursor (keyset) de produtos
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_products_price_id", "products", ["price", "id"])
+    op.create_index("ix_products_organization_id_id", "products", ["organization_id", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_organization_id_id", table_name="products")
+    op.drop_index("ix_products_price_id", table_name="products")
@@ -0,0 +1,26 @@
+"""SKU externo de produto, único por ONG (upsert da importação em lote)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("products", sa.Column("sku", sa.String(length=64), nullable=True))
+    op.create_index("uq_products_organization_id_sku", "products", ["organization_id", "sku"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("uq_products_organization_id_sku", table_name="products")
+    op.drop_column("products", "sku")
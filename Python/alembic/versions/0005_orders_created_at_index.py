@@ -0,0 +1,25 @@
+"""Índices da exportação de vendas: orders.created_at (período) e order_items.order_id (junção)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_orders_created_at", "orders", ["created_at"])
+    op.create_index("ix_order_items_order_id", "order_items", ["order_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_order_items_order_id", table_name="order_items")
+    op.drop_index("ix_orders_created_at", table_name="orders")
@@ -0,0 +1,44 @@
+"""Resumo de vendas por produto por dia (painel da ONG), preenchido a partir de order_items
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# Dia UTC do pedido (o mesmo de crud._sales_day_expr)
+SALES_DAY_SQL = {
+    "postgresql": "(o.created_at AT TIME ZONE 'UTC')::date",
+    "sqlite": "date(o.created_at)",
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_sales_daily",
+        sa.Column("organization_id", sa.Integer(), sa.ForeignKey("organizations.id"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), primary_key=True),
+        sa.Column("units", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Numeric(14, 2), nullable=False),
+    )
+    day = SALES_DAY_SQL[op.get_bind().dialect.name]
+    op.execute(
+        "INSERT INTO product_sales_daily (organization_id, day, product_id, units, revenue) "
+        f"SELECT oi.organization_id, {day}, oi.product_id, SUM(oi.quantity), SUM(oi.quantity * oi.price_at_purchase) "
+        "FROM order_items oi JOIN orders o ON o.id = oi.order_id "
+        f"GROUP BY oi.organization_id, {day}, oi.product_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("product_sales_daily")
@@ -1,9 +1,18 @@
 import os
 import json
+import asyncio
 import logging
+import threading
+import time
 import google.generativeai as genai
 from google.api_core.exceptions import DeadlineExceeded
 from pydantic import ValidationError
+from typing import Iterable, Optional
+
+from .search_cache import search_cache
+from .search_rules import parse_simple_query
+from .circuit_breaker import CircuitBreaker
+from . import metrics
 
 # Configura o logger
 logger = logging.getLogger("marketplace_api")
@@ -22,6 +31,27 @@ except ImportError:
 
 AI_SEARCH_TIMEOUT_SECONDS = float(os.getenv("AI_SEARCH_TIMEOUT_SECONDS", 3.0))
 
+# Máximo de chamadas simultâneas ao Gemini por worker (caminho assíncrono).
+# Acima disso a busca vai direto para o fallback em vez de enfileirar.
+AI_SEARCH_MAX_CONCURRENCY = int(os.getenv("AI_SEARCH_MAX_CONCURRENCY", 8))
+_llm_slots = asyncio.Semaphore(AI_SEARCH_MAX_CONCURRENCY)
+
+# Circuit breaker em volta do Gemini: durante uma degradação, a busca vai
+# direto para o fallback em vez de esperar o timeout a cada requisição.
+# O timeout efetivo se adapta às latências observadas (teto: AI_SEARCH_TIMEOUT_SECONDS).
+ai_circuit = CircuitBreaker(
+    name="gemini",
+    max_timeout=AI_SEARCH_TIMEOUT_SECONDS,
+    min_timeout=float(os.getenv("AI_SEARCH_TIMEOUT_MIN_SECONDS", 0.5)),
+    window_seconds=float(os.getenv("AI_CIRCUIT_WINDOW_SECONDS", 30)),
+    min_calls=int(os.getenv("AI_CIRCUIT_MIN_CALLS", 10)),
+    failure_rate_threshold=float(os.getenv("AI_CIRCUIT_FAILURE_RATE", 0.5)),
+    open_seconds=float(os.getenv("AI_CIRCUIT_OPEN_SECONDS", 15)),
+)
+
+# Modelo usado na Busca AI (pode ser trocado sem alterar o código)
+AI_SEARCH_MODEL_NAME = os.getenv("AI_SEARCH_MODEL_NAME", "gemini-1.5-flash") # gemini-2.5-flash-preview-09-2025
+
 # Define o schema JSON que queremos que a AI retorne
 AI_RESPONSE_SCHEMA = {
     "type": "OBJECT",
@@ -33,12 +63,16 @@ AI_RESPONSE_SCHEMA = {
     },
     "required": [] # Nenhum campo é estritamente obrigatório
 }
+# Serializado uma única vez, no import
+AI_RESPONSE_SCHEMA_JSON = json.dumps(AI_RESPONSE_SCHEMA)
+
+AI_GENERATION_CONFIG = {"response_mime_type": "application/json"}
 
 # O prompt do sistema que instrui a AI
 AI_SYSTEM_PROMPT = f"""
 Você é um assistente de e-commerce para um marketplace de ONGs.
 Sua tarefa é analisar a consulta de busca do usuário e extraí-la em um formato JSON.
-O JSON deve seguir este schema: {json.dumps(AI_RESPONSE_SCHEMA)}
+O JSON deve seguir este schema: {AI_RESPONSE_SCHEMA_JSON}
 
 - Se o usuário mencionar um tipo de produto, preencha 'category'.
 - Se o usuário mencionar valores (ex: 'até 50 reais', 'acima de 10', 'entre 10 e 30'), preencha 'price_min' e/ou 'price_max'.
@@ -47,7 +81,88 @@ O JSON deve seguir este schema: {json.dumps(AI_RESPONSE_SCHEMA)}
 - Retorne apenas o objeto JSON, sem nenhum texto adicional.
 """
 
-def parse_search_query(text: str) -> dict:
+def _finish_lookup(text: str, result: dict, source: str, log_extra: Optional[dict]) -> dict:
+    """ Grava o resultado no cache e preenche os campos de log. """
+    if source == "llm":
+        search_cache.set(text, result)  # Resultados com 'error' são ignorados
+    metrics.observe_ai_lookup(source, result)
+    if log_extra is not None:
+        log_extra["ai_source"] = source # rules | cache | llm
+        log_extra.update(search_cache.stats())
+        log_extra.update(ai_circuit.stats())
+    return result
+
+def parse_search_query(text: str, categories: Iterable[str] = (), log_extra: Optional[dict] = None) -> dict:
+    """
+    Converte texto em filtros JSON.
+    Ordem: pré-parser local (regras) -> cache -> LLM.
+    'categories' são as categorias conhecidas, usadas pelo pré-parser.
+    Se 'log_extra' for informado, recebe o caminho que respondeu e os contadores do cache.
+    Retorna um dicionário com os filtros ou um dicionário de erro com fallback.
+    """
+    simple = parse_simple_query(text, categories)
+    if simple is not None:
+        return _finish_lookup(text, simple, "rules", log_extra)
+    cached = search_cache.get(text)
+    if cached is not None:
+        return _finish_lookup(text, cached, "cache", log_extra)
+    return _finish_lookup(text, _parse_with_llm(text), "llm", log_extra)
+
+async def parse_search_query_async(text: str, categories: Iterable[str] = (), log_extra: Optional[dict] = None) -> dict:
+    """
+    Versão assíncrona de parse_search_query: não ocupa uma thread do
+    threadpool enquanto espera o Gemini.
+    """
+    simple = parse_simple_query(text, categories)
+    if simple is not None:
+        return _finish_lookup(text, simple, "rules", log_extra)
+    cached = search_cache.get(text)
+    if cached is not None:
+        return _finish_lookup(text, cached, "cache", log_extra)
+    return _finish_lookup(text, await _parse_with_llm_async(text), "llm", log_extra)
+
+# O modelo (e o cliente/transporte que ele mantém) é criado uma única vez
+# e compartilhado entre as requisições.
+_model = None
+_model_lock = threading.Lock()
+
+def _build_model():
+    return genai.GenerativeModel(
+        model_name=AI_SEARCH_MODEL_NAME,
+        system_instruction=AI_SYSTEM_PROMPT,
+        generation_config=AI_GENERATION_CONFIG
+    )
+
+def _get_model():
+    """ Retorna o modelo compartilhado, criando-o no primeiro uso. """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = _build_model()
+    return _model
+
+def reset_model(model_name: Optional[str] = None) -> None:
+    """
+    Descarta o modelo compartilhado; o próximo uso cria um novo.
+    Permite trocar o modelo em tempo de execução (ex: após mudar o .env).
+    """
+    global _model, AI_SEARCH_MODEL_NAME
+    with _model_lock:
+        AI_SEARCH_MODEL_NAME = model_name or os.getenv("AI_SEARCH_MODEL_NAME", "gemini-1.5-flash")
+        _model = None
+
+def _build_prompt(text: str) -> str:
+    return f"Analise a seguinte consulta: '{text}'"
+
+def _extract_filters(response_text: str) -> dict:
+    # Limpa e carrega o JSON
+    parsed_json = json.loads(response_text)
+
+    # Filtra chaves vazias ou nulas
+    return {k: v for k, v in parsed_json.items() if v is not None and v != ""}
+
+def _parse_with_llm(text: str) -> dict:
     """
     Usa o LLM para converter texto em filtros JSON.
     Retorna um dicionário com os filtros ou um dicionário de erro com fallback.
@@ -56,32 +171,85 @@ def parse_search_query(text: str) -> dict:
         logger.warning("AI Search pulada: genai não configurado.")
         return {"error": "AI not configured", "fallback_term": text}
 
+    if not ai_circuit.allow_request():
+        return {"error": "circuit open", "fallback_term": text}
+
+    timeout = ai_circuit.current_timeout()
+    start = time.perf_counter()
     try:
-        model = genai.GenerativeModel(
-            model_name="gemini-1.5-flash", # gemini-2.5-flash-preview-09-2025
-            system_instruction=AI_SYSTEM_PROMPT,
-            generation_config={"response_mime_type": "application/json"}
-        )
-        
-        prompt = f"Analise a seguinte consulta: '{text}'"
+        model = _get_model()
         
         # Faz a chamada com timeout
         response = model.generate_content(
-            prompt,
-            request_options={'timeout': AI_SEARCH_TIMEOUT_SECONDS}
+            _build_prompt(text),
+            request_options={'timeout': timeout}
         )
         
-        # Limpa e carrega o JSON
-        parsed_json = json.loads(response.text)
-        
-        # Filtra chaves vazias ou nulas
-        filters = {k: v for k, v in parsed_json.items() if v is not None and v != ""}
-        
+        filters = _extract_filters(response.text)
+        ai_circuit.record_success(time.perf_counter() - start)
+        metrics.observe_ai_llm_call("success", time.perf_counter() - start)
         return filters
 
     except (DeadlineExceeded, TimeoutError):
-        logger.warning(f"AI Search timeout ({AI_SEARCH_TIMEOUT_SECONDS}s) para a consulta: '{text}'")
+        ai_circuit.record_failure(latency_seconds=timeout)
+        metrics.observe_ai_llm_call("timeout", time.perf_counter() - start)
+        logger.warning(f"AI Search timeout ({timeout:.2f}s) para a consulta: '{text}'")
         return {"error": "timeout", "fallback_term": text}
     except Exception as e:
+        ai_circuit.record_failure()
+        metrics.observe_ai_llm_call("error", time.perf_counter() - start)
         logger.error(f"AI Search erro: {e} | Consulta: '{text}'")
-        return {"error": str(e), "fallback_term": text}
\ No newline at end of file
+        return {"error": str(e), "fallback_term": text}
+
+async def _parse_with_llm_async(text: str) -> dict:
+    """
+    Igual a _parse_with_llm, mas usando a geração assíncrona do SDK.
+    Se todas as vagas de concorrência estiverem ocupadas, não enfileira:
+    vai direto para o fallback.
+    """
+    if not genai:
+        logger.warning("AI Search pulada: genai não configurado.")
+        return {"error": "AI not configured", "fallback_term": text}
+
+    if _llm_slots.locked():
+        logger.warning(f"AI Search saturada ({AI_SEARCH_MAX_CONCURRENCY} chamadas em andamento) para a consulta: '{text}'")
+        return {"error": "overloaded", "fallback_term": text}
+
+    if not ai_circuit.allow_request():
+        return {"error": "circuit open", "fallback_term": text}
+
+    async with _llm_slots:
+        timeout = ai_circuit.current_timeout()
+        start = time.perf_counter()
+        try:
+            model = _get_model()
+
+            # O wait_for garante o limite mesmo se o transporte ignorar o timeout
+            response = await asyncio.wait_for(
+                model.generate_content_async(
+                    _build_prompt(text),
+                    request_options={'timeout': timeout}
+                ),
+                timeout=timeout
+            )
+
+            filters = _extract_filters(response.text)
+            ai_circuit.record_success(time.perf_counter() - start)
+            metrics.observe_ai_llm_call("success", time.perf_counter() - start)
+            return filters
+
+        except (DeadlineExceeded, TimeoutError):
+            ai_circuit.record_failure(latency_seconds=timeout)
+            metrics.observe_ai_llm_call("timeout", time.perf_counter() - start)
+            logger.warning(f"AI Search timeout ({timeout:.2f}s) para a consulta: '{text}'")
+            return {"error": "timeout", "fallback_term": text}
+        except Exception as e:
+            ai_circuit.record_failure()
+            metrics.observe_ai_llm_call("error", time.perf_counter() - start)
+            logger.error(f"AI Search erro: {e} | Consulta: '{text}'")
+            return {"error": str(e), "fallback_term": text}
+        except BaseException:
+            # Cancelada de fora (cliente desconectou, wait_for externo): sem
+            # resultado, mas a chamada de teste do half-open precisa ser liberada
+            ai_circuit.record_cancelled()
+            raise
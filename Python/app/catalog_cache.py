@@ -0,0 +1,196 @@
+import os
+import asyncio
+import json
+import time
+import hashlib
+import threading
+from decimal import Decimal
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from .ttl_cache import InMemoryTTLCache
+
+# Cache do catálogo público.
+#
+# 'version' é um contador de geração do catálogo: toda escrita de produto
+# (crud.create_org_product / update_product / delete_product) chama
+# invalidate(), o que descarta na hora os dados cacheados neste worker.
+# Como cada worker do uvicorn tem o seu contador, o TTL limita quanto tempo
+# um worker que não recebeu a escrita pode servir dados antigos.
+
+CATEGORY_CACHE_TTL_SECONDS = float(os.getenv("CATEGORY_CACHE_TTL_SECONDS", 60))
+# Tempo que o navegador/CDN pode reutilizar a resposta sem revalidar
+CATEGORY_CACHE_MAX_AGE_SECONDS = int(os.getenv("CATEGORY_CACHE_MAX_AGE_SECONDS", 60))
+
+# Páginas de /public/products já serializadas. O TTL é curto porque os
+# pedidos baixam o estoque (stock_qty aparece na listagem) sem invalidar o
+# cache; o estoque real é sempre conferido na criação do pedido.
+PRODUCT_LIST_CACHE_MAX_ENTRIES = int(os.getenv("PRODUCT_LIST_CACHE_MAX_ENTRIES", 512))
+PRODUCT_LIST_CACHE_TTL_SECONDS = float(os.getenv("PRODUCT_LIST_CACHE_TTL_SECONDS", 10))
+PRODUCT_LIST_CACHE_MAX_AGE_SECONDS = int(os.getenv("PRODUCT_LIST_CACHE_MAX_AGE_SECONDS", 10))
+
+_version = 0
+_version_lock = threading.Lock()
+_last_write_at = float("-inf")  # time.monotonic() da última escrita vista neste worker
+
+
+def current_version() -> int:
+    return _version
+
+
+def invalidate() -> None:
+    """ Chamado após qualquer escrita de produto. """
+    global _version, _last_write_at
+    with _version_lock:
+        _version += 1
+        _last_write_at = time.monotonic()
+
+
+def seconds_since_write() -> float:
+    """ Usado no roteamento de leituras: logo após uma escrita, a réplica pode estar atrasada. """
+    return time.monotonic() - _last_write_at
+
+
+def make_etag(payload: bytes) -> str:
+    """ ETag forte derivado do conteúdo: igual em todos os workers para os mesmos dados. """
+    return '"' + hashlib.sha1(payload).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """ Avalia o header If-None-Match (aceita lista, '*' e prefixo W/). """
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+
+class CategoryEntry:
+    """ Snapshot das categorias com contagem de produtos e os ETags das duas representações. """
+
+    def __init__(self, counts: List[Tuple[str, int]]):
+        self.counts = [{"category": name, "product_count": total} for name, total in counts]
+        self.names = [item["category"] for item in self.counts]
+        self.names_etag = make_etag(json.dumps(self.names).encode())
+        self.counts_etag = make_etag(json.dumps(self.counts).encode())
+
+
+class CategoryCache:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entry: Optional[CategoryEntry] = None
+        self._entry_version = -1
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._async_lock: Optional[asyncio.Lock] = None
+
+    def _fresh(self) -> Optional[CategoryEntry]:
+        if self._entry_version == _version and time.monotonic() < self._expires_at:
+            return self._entry
+        return None
+
+    def get(self, loader: Callable[[], List[Tuple[str, int]]]) -> CategoryEntry:
+        """
+        Retorna o snapshot cacheado ou chama 'loader' (consulta ao banco).
+        Só uma thread recarrega por vez; as outras aguardam e reaproveitam.
+        """
+        entry = self._fresh()
+        if entry is not None:
+            return entry
+        with self._lock:
+            entry = self._fresh()
+            if entry is not None:
+                return entry
+            version = _version  # Lido antes da consulta: uma escrita concorrente invalida o resultado
+            entry = CategoryEntry(loader())
+            self._store(entry, version)
+            return entry
+
+    async def get_async(self, loader: Callable[[], Awaitable[List[Tuple[str, int]]]]) -> CategoryEntry:
+        """ Igual a get(), com 'loader' assíncrono (rotas async): só uma corrotina recarrega. """
+        entry = self._fresh()
+        if entry is not None:
+            return entry
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        async with self._async_lock:
+            entry = self._fresh()
+            if entry is not None:
+                return entry
+            version = _version
+            entry = CategoryEntry(await loader())
+            self._store(entry, version)
+            return entry
+
+    def _store(self, entry: CategoryEntry, version: int) -> None:
+        self._entry, self._entry_version = entry, version
+        self._expires_at = time.monotonic() + self.ttl_seconds
+
+
+categories = CategoryCache(CATEGORY_CACHE_TTL_SECONDS)
+
+
+class ProductListEntry:
+    """ Página do catálogo pronta para envio: corpo JSON, ETag e cursor da próxima página. """
+
+    __slots__ = ("body", "etag", "next_cursor")
+
+    def __init__(self, body: bytes, next_cursor: Optional[str]):
+        self.body = body
+        self.etag = make_etag(body)
+        self.next_cursor = next_cursor
+
+
+def _decimal_key(value: Optional[Decimal]) -> str:
+    # 10, 10.0 e 10.00 filtram igual
+    return "" if value is None else format(value.normalize(), "f")
+
+
+def product_list_key(
+    skip: int,
+    limit: int,
+    category: Optional[str],
+    price_min: Optional[Decimal],
+    price_max: Optional[Decimal],
+    search: Optional[str],
+    sort: str,
+    cursor: Optional[str],
+) -> str:
+    """
+    Chave dos parâmetros normalizados: string vazia vale o mesmo que ausente
+    e 'sort' já vem resolvido (pagination.resolve_sort). Textos não mudam de
+    caixa: no SQLite o ILIKE só ignora caixa em ASCII.
+    """
+    return json.dumps([
+        skip, limit, category or "", _decimal_key(price_min), _decimal_key(price_max),
+        search or "", sort, cursor or "",
+    ], ensure_ascii=False, separators=(",", ":"))
+
+
+class ProductListCache:
+    """
+    LRU com TTL das páginas do catálogo. A versão do catálogo faz parte da
+    chave: após invalidate() as entradas antigas deixam de ser encontradas e
+    saem pelo LRU/TTL.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._entries = InMemoryTTLCache(max_entries, ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[ProductListEntry]:
+        entry = self._entries.get(f"{_version}:{key}")
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def set(self, key: str, entry: ProductListEntry, version: int) -> None:
+        """ 'version' deve ser lida antes da consulta: uma escrita concorrente descarta o resultado. """
+        self._entries.set(f"{version}:{key}", entry)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+product_lists = ProductListCache(PRODUCT_LIST_CACHE_MAX_ENTRIES, PRODUCT_LIST_CACHE_TTL_SECONDS)
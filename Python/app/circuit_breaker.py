@@ -0,0 +1,145 @@
+import time
+import logging
+import threading
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger("marketplace_api")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker com janela deslizante de resultados e timeout adaptativo.
+
+    - closed: as chamadas passam; se a taxa de erro/timeout na janela passar do
+      limite (com um mínimo de chamadas), o circuito abre.
+    - open: as chamadas falham na hora (fallback) até passar 'open_seconds'.
+    - half_open: uma única chamada de teste passa, com 'max_timeout'; sucesso
+      fecha o circuito, falha abre de novo, cancelamento libera outra chamada.
+
+    O timeout sugerido é derivado do percentil das latências observadas
+    (vezes uma margem), limitado entre 'min_timeout' e 'max_timeout'. Um
+    timeout conta como latência igual ao limite usado: se o serviço ficou
+    mais lento, o timeout sugerido cresce em vez de cortar toda chamada.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_timeout: float,
+        min_timeout: float = 0.5,
+        window_seconds: float = 30.0,
+        min_calls: int = 10,
+        failure_rate_threshold: float = 0.5,
+        open_seconds: float = 15.0,
+        latency_percentile: float = 0.99,
+        latency_margin: float = 1.5,
+        latency_samples: int = 200,
+    ):
+        self.name = name
+        self.max_timeout = max_timeout
+        self.min_timeout = min(min_timeout, max_timeout)
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.open_seconds = open_seconds
+        self.latency_percentile = latency_percentile
+        self.latency_margin = latency_margin
+
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._results = deque()  # (timestamp, sucesso)
+        self._latencies = deque(maxlen=latency_samples)
+        self._lock = threading.Lock()
+
+    # --- Consulta de estado ---
+
+    def allow_request(self) -> bool:
+        """ Indica se a chamada pode seguir para o serviço externo. """
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    return False
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def current_timeout(self) -> float:
+        """ Timeout adaptativo com base nas latências recentes (teto na chamada de teste). """
+        with self._lock:
+            if self.state == HALF_OPEN or len(self._latencies) < self.min_calls:
+                return self.max_timeout
+            ordered = sorted(self._latencies)
+            index = min(len(ordered) - 1, int(len(ordered) * self.latency_percentile))
+            suggested = ordered[index] * self.latency_margin
+            return max(self.min_timeout, min(self.max_timeout, suggested))
+
+    # --- Registro de resultados ---
+
+    def record_success(self, latency_seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(latency_seconds)
+            self._record(True)
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                self._results.clear()
+                self._transition(CLOSED)
+
+    def record_failure(self, latency_seconds: Optional[float] = None) -> None:
+        """ 'latency_seconds': o timeout usado, quando a falha foi um timeout. """
+        with self._lock:
+            if latency_seconds is not None:
+                self._latencies.append(latency_seconds)
+            self._record(False)
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                self._open()
+            elif self.state == CLOSED:
+                total = len(self._results)
+                failures = sum(1 for _, ok in self._results if not ok)
+                if total >= self.min_calls and failures / total >= self.failure_rate_threshold:
+                    self._open(failure_rate=round(failures / total, 3))
+
+    def record_cancelled(self) -> None:
+        """ Chamada cancelada sem resultado (ex: cliente desconectou): libera a chamada de teste. """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        """ Campos para o log estruturado. """
+        return {
+            "circuit_state": self.state,
+            "circuit_timeout_s": round(self.current_timeout(), 3),
+        }
+
+    # --- Internos (chamados com o lock adquirido) ---
+
+    def _record(self, ok: bool) -> None:
+        now = time.monotonic()
+        self._results.append((now, ok))
+        while self._results and now - self._results[0][0] > self.window_seconds:
+            self._results.popleft()
+
+    def _open(self, **details) -> None:
+        self._opened_at = time.monotonic()
+        self._transition(OPEN, **details)
+
+    def _transition(self, new_state: str, **details) -> None:
+        previous, self.state = self.state, new_state
+        log_data = {
+            "circuit": self.name,
+            "circuit_previous_state": previous,
+            "circuit_state": new_state,
+            **details,
+        }
+        log = logger.warning if new_state == OPEN else logger.info
+        log(f"Circuit breaker '{self.name}': {previous} -> {new_state}", extra={"extra_data": log_data})
@@ -1,9 +1,17 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, distinct
-from . import models, security
-from .schemas import UserCreate, ProductCreate, OrderCreate, OrderItemCreate
-from typing import Optional, List
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, distinct, func, insert, update, select, cast, type_coerce, Date, Numeric, Row
+from sqlalchemy.sql import Select
+from sqlalchemy.dialects import postgresql, sqlite
+from . import models, security, search_index, pagination, catalog_cache
+from .serialization import PRODUCT_COLUMNS
+from .search_cache import normalize_query
+from .schemas import UserCreate, ProductCreate, ProductImportRow, OrderCreate, OrderItemCreate
+from .schemas import Order as OrderSchema, OrderItem as OrderItemSchema
+from typing import Optional, List, Sequence, Tuple
 from decimal import Decimal
+from datetime import date, datetime, timezone
+from collections import defaultdict
 from fastapi import HTTPException, status
 
 # --- Funções de Usuário e Autenticação (Bloco 2) ---
@@ -18,10 +26,21 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[models
     Retorna o objeto User se for válido, senão None.
     """
     user = get_user_by_email(db, email)
-    if not user:
-        return None # Usuário não encontrado
-    if not security.verify_password(password, user.hashed_password):
-        return None # Senha incorreta
+    # Usuário inexistente também paga um bcrypt (tempo de resposta constante)
+    if not security.verify_password_or_dummy(password, user.hashed_password if user else None):
+        return None # Usuário não encontrado ou senha incorreta
+    return user
+
+async def authenticate_user_async(db: AsyncSession, email: str, password: str) -> Optional[models.User]:
+    """
+    Versão assíncrona de authenticate_user: o bcrypt roda no pool de threads
+    de security (verify_password_async), fora do event loop.
+    """
+    user = (await db.scalars(select(models.User).filter(models.User.email == email))).first()
+    # Libera a conexão antes do bcrypt, que pode esperar na fila do pool
+    await db.close()
+    if not await security.verify_password_async(password, user.hashed_password if user else None):
+        return None
     return user
 
 def create_user(db: Session, user: UserCreate) -> models.User:
@@ -49,11 +68,40 @@ def get_product(db: Session, product_id: int, organization_id: int) -> Optional[
         models.Product.organization_id == organization_id
     ).first()
 
-def get_products_by_org(db: Session, organization_id: int, skip: int = 0, limit: int = 100) -> List[models.Product]:
-    """ Lista todos os produtos de UMA ONG específica. """
-    return db.query(models.Product).filter(
+def get_products_by_org(
+    db: Session,
+    organization_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> List[models.Product]:
+    """
+    Lista todos os produtos de UMA ONG específica, ordenados por id.
+    Com 'cursor', pagina por keyset (índice organization_id, id) e ignora 'skip'.
+    """
+    query = db.query(models.Product).filter(
         models.Product.organization_id == organization_id
-    ).offset(skip).limit(limit).all()
+    )
+    query = pagination.order_query(query, "id")
+    if cursor:
+        return pagination.seek_query(query, "id", cursor).limit(limit).all()
+    return query.offset(skip).limit(limit).all()
+
+def get_product_rows_by_org(
+    db: Session,
+    organization_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> Sequence[Row]:
+    """
+    Mesma listagem de get_products_by_org, mas só com as colunas de
+    schemas.Product (linhas, sem entidades ORM), para serialization.product_rows_json.
+    """
+    stmt = select(*PRODUCT_COLUMNS).filter(models.Product.organization_id == organization_id)
+    stmt = pagination.order_query(stmt, "id")
+    stmt = pagination.seek_query(stmt, "id", cursor) if cursor else stmt.offset(skip)
+    return db.execute(stmt.limit(limit)).all()
 
 def create_org_product(db: Session, product: ProductCreate, organization_id: int) -> models.Product:
     """ 
@@ -66,6 +114,7 @@ def create_org_product(db: Session, product: ProductCreate, organization_id: int
     )
     db.add(db_product)
     db.commit()
+    catalog_cache.invalidate()
     db.refresh(db_product)
     return db_product
 
@@ -82,6 +131,7 @@ def update_product(
         
     db.add(db_product)
     db.commit()
+    catalog_cache.invalidate()
     db.refresh(db_product)
     return db_product
 
@@ -89,8 +139,39 @@ def delete_product(db: Session, db_product: models.Product):
     """ Deleta um produto. """
     db.delete(db_product)
     db.commit()
+    catalog_cache.invalidate()
     return {"ok": True}
 
+async def upsert_org_products_async(db: AsyncSession, rows: List[ProductImportRow], organization_id: int) -> Tuple[int, int]:
+    """
+    Grava um lote da importação: insere os SKUs novos e atualiza os
+    existentes da ONG (INSERT ... ON CONFLICT (organization_id, sku)), numa
+    transação. Se o SKU se repete no lote, vale a última linha.
+    Retorna (produtos gravados, produtos criados), contados por SKU.
+    """
+    by_sku = {row.sku: row for row in rows}
+    existing = set((await db.scalars(
+        select(models.Product.sku)
+        .where(models.Product.organization_id == organization_id, models.Product.sku.in_(list(by_sku)))
+    )).all())
+    values = [{**row.model_dump(), "organization_id": organization_id} for row in by_sku.values()]
+    await db.execute(_upsert_products_stmt(db.bind.dialect.name), values)
+    await db.commit()
+    catalog_cache.invalidate()
+    return len(by_sku), len(by_sku.keys() - existing)
+
+def _upsert_products_stmt(dialect_name: str):
+    dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    # Insert na Table (não na entidade): evita o caminho de bulk insert do ORM.
+    # O RETURNING faz o SQLAlchemy agrupar as linhas em INSERTs de várias
+    # linhas (insertmanyvalues) em vez de um executemany linha a linha.
+    table = models.Product.__table__
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.organization_id, table.c.sku],
+        set_={field: stmt.excluded[field] for field in ProductCreate.model_fields},
+    ).returning(table.c.id)
+
 # --- Funções do Portal Público (Bloco 4) ---
 
 def get_public_products(
@@ -100,84 +181,351 @@ def get_public_products(
     category: Optional[str] = None,
     price_min: Optional[Decimal] = None,
     price_max: Optional[Decimal] = None,
-    search: Optional[str] = None # Para o fallback
+    search: Optional[str] = None, # Para o fallback
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None
 ) -> List[models.Product]:
     """
     Busca produtos publicamente com filtros e paginação.
+    - Sem 'cursor': paginação por skip/limit (compatível com o front atual).
+    - Com 'cursor': paginação por keyset em (sort, id); 'skip' é ignorado.
+    'sort' aceita id, price, -price ou relevance (padrão quando há 'search').
     """
-    query = db.query(models.Product)
+    stmt = _public_products_stmt(
+        db.get_bind().dialect.name, skip, limit, category, price_min, price_max, search, sort, cursor
+    )
+    return db.scalars(stmt).all()
+
+async def get_public_products_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 20,
+    category: Optional[str] = None,
+    price_min: Optional[Decimal] = None,
+    price_max: Optional[Decimal] = None,
+    search: Optional[str] = None,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None
+) -> List[models.Product]:
+    """ Versão assíncrona de get_public_products (mesma consulta). """
+    stmt = _public_products_stmt(
+        db.bind.dialect.name, skip, limit, category, price_min, price_max, search, sort, cursor
+    )
+    return (await db.scalars(stmt)).all()
+
+async def get_public_product_rows_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 20,
+    category: Optional[str] = None,
+    price_min: Optional[Decimal] = None,
+    price_max: Optional[Decimal] = None,
+    search: Optional[str] = None,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None
+) -> Sequence[Row]:
+    """ get_public_products_async só com as colunas de schemas.Product (linhas, sem entidades ORM). """
+    stmt = _public_products_stmt(
+        db.bind.dialect.name, skip, limit, category, price_min, price_max, search, sort, cursor
+    )
+    return (await db.execute(stmt.with_only_columns(*PRODUCT_COLUMNS))).all()
+
+def _public_products_stmt(
+    dialect_name: str,
+    skip: int,
+    limit: int,
+    category: Optional[str],
+    price_min: Optional[Decimal],
+    price_max: Optional[Decimal],
+    search: Optional[str],
+    sort: Optional[str],
+    cursor: Optional[str]
+) -> Select:
+    """ Monta o SELECT do catálogo público (compartilhado pelas versões sync e async). """
+    sort = pagination.resolve_sort(sort, search)
+    query = select(models.Product)
+    use_full_text = dialect_name == "postgresql"
     
     if category:
-        query = query.filter(models.Product.category.ilike(f"%{category}%"))
+        if use_full_text:
+            # Sem acentos e servido pelo índice trigram (ix_products_category_trgm)
+            query = query.filter(
+                search_index.product_category_expr().like(f"%{normalize_query(category)}%")
+            )
+        else:
+            query = query.filter(models.Product.category.ilike(f"%{category}%"))
     if price_min is not None:
         query = query.filter(models.Product.price >= price_min)
     if price_max is not None:
         query = query.filter(models.Product.price <= price_max)
     if search:
-        # Busca simples por texto no nome e descrição (fallback da AI)
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                models.Product.name.ilike(search_term),
-                models.Product.description.ilike(search_term)
+        if use_full_text:
+            # Busca textual em português, sem acentos, ordenada por relevância
+            ts_vector = search_index.product_search_vector()
+            ts_query = search_index.product_search_query(search)
+            query = query.filter(ts_vector.op("@@")(ts_query))
+            if sort == pagination.RELEVANCE:
+                query = query.order_by(func.ts_rank(ts_vector, ts_query).desc())
+        else:
+            # Busca simples por texto no nome e descrição (fallback da AI)
+            search_term = f"%{search}%"
+            query = query.filter(
+                or_(
+                    models.Product.name.ilike(search_term),
+                    models.Product.description.ilike(search_term)
+                )
             )
-        )
         
-    products = query.offset(skip).limit(limit).all()
-    return products
+    query = pagination.order_query(query, sort)
+
+    if cursor:
+        return pagination.seek_query(query, sort, cursor).limit(limit)
+    return query.offset(skip).limit(limit)
+
+def get_category_counts(db: Session) -> List[Tuple[str, int]]:
+    """ Retorna (categoria, quantidade de produtos), em ordem alfabética. """
+    rows = db.execute(_category_counts_stmt()).all()
+    return [(category, total) for category, total in rows]
 
-def get_all_categories(db: Session) -> List[str]:
-    """ Retorna uma lista de categorias únicas para os filtros. """
-    categories = db.query(models.Product.category).distinct().all()
-    # O resultado é uma lista de tuplas, ex: [('Alimentos',), ('Decoração',)]
-    return [category[0] for category in categories if category[0]]
+async def get_category_counts_async(db: AsyncSession) -> List[Tuple[str, int]]:
+    """ Versão assíncrona de get_category_counts (usada por /public/categories). """
+    rows = (await db.execute(_category_counts_stmt())).all()
+    return [(category, total) for category, total in rows]
 
+def _category_counts_stmt() -> Select:
+    return select(
+        models.Product.category, func.count(models.Product.id)
+    ).filter(
+        models.Product.category.isnot(None), models.Product.category != ""
+    ).group_by(models.Product.category).order_by(models.Product.category)
 
-def create_order(db: Session, order_data: OrderCreate) -> models.Order:
+
+def create_order(db: Session, order_data: OrderCreate) -> OrderSchema:
     """
-    Cria um registro de Pedido e seus Itens.
-    ETAPA 1: Não se preocupa com concorrência ou baixa de estoque.
+    Cria um registro de Pedido e seus Itens em UMA transação:
+    - baixa atômica do estoque de cada produto (UPDATE condicional com
+      RETURNING do preço), em ordem crescente de product_id;
+    - INSERT do pedido com RETURNING (id, created_at) via flush;
+    - um único INSERT multi-linha dos itens com RETURNING dos ids;
+    - upsert das vendas do dia no resumo product_sales_daily (painel da ONG);
+    - um único COMMIT.
+    A resposta é montada em memória, sem reler o pedido do banco.
+
+    Concorrência: o UPDATE ... WHERE stock_qty >= :q só baixa o estoque se
+    houver saldo (o PostgreSQL reavalia a condição após esperar o lock da
+    linha), então não há overselling. Como os locks são sempre tomados na
+    mesma ordem (product_id), dois pedidos não entram em deadlock.
+    Estoque insuficiente -> 409; produto inexistente -> 404.
     """
     
-    # 1. Busca os produtos e seus preços atuais
-    product_ids = [item.product_id for item in order_data.items]
-    products_query = db.query(models.Product).filter(models.Product.id.in_(product_ids)).all()
-    product_map = {p.id: p for p in products_query}
+    # 1. Soma as quantidades por produto (o mesmo produto pode vir repetido)
+    quantities = _order_quantities(order_data)
 
-    # 2. Valida se todos os produtos existem
-    for item in order_data.items:
-        if item.product_id not in product_map:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Produto com ID {item.product_id} não encontrado."
-            )
+    # 2. Baixa o estoque e obtém os preços atuais, em ordem determinística
+    product_map = {}
+    for product_id in sorted(quantities):
+        row = db.execute(_reserve_stock_stmt(product_id, quantities[product_id])).first()
+        if row is None:
+            db.rollback() # Devolve as baixas já feitas neste pedido
+            exists = db.execute(_product_exists_stmt(product_id)).first() is not None
+            raise _unavailable_error(product_id, exists)
+        product_map[product_id] = row
 
-    # 3. Cria o Pedido (Order)
+    # 3. Cria o Pedido (Order). O flush obtém id e created_at (eager_defaults)
+    #    sem commit: se algo falhar adiante, nada fica gravado.
     db_order = models.Order()
     db.add(db_order)
+    db.flush()
+
+    # 4. Cria os Itens do Pedido (OrderItems) num único INSERT multi-linha
+    item_rows = _order_item_rows(order_data, db_order.id, product_map)
+    item_ids = []
+    if item_rows:
+        item_ids = db.scalars(_insert_items_stmt(), item_rows).all()
+
+    # 5. Soma o pedido ao resumo diário por produto, na mesma transação.
+    #    As linhas do resumo são as dos produtos já travados no passo 2.
+    if item_rows:
+        db.execute(_sales_rollup_stmt(db.bind.dialect.name), _sales_rollup_rows(db_order.created_at, item_rows))
+
+    # Monta a resposta antes do commit (o commit expira os objetos do ORM)
+    created_order = _order_response(db_order, item_ids, item_rows)
     db.commit()
-    db.refresh(db_order) # Pega o ID do pedido recém-criado
+    
+    return created_order
+
+async def create_order_async(db: AsyncSession, order_data: OrderCreate) -> OrderSchema:
+    """ Versão assíncrona de create_order: mesmos comandos SQL, mesma transação. """
+    quantities = _order_quantities(order_data)
+
+    product_map = {}
+    for product_id in sorted(quantities):
+        row = (await db.execute(_reserve_stock_stmt(product_id, quantities[product_id]))).first()
+        if row is None:
+            await db.rollback()
+            exists = (await db.execute(_product_exists_stmt(product_id))).first() is not None
+            raise _unavailable_error(product_id, exists)
+        product_map[product_id] = row
+
+    db_order = models.Order()
+    db.add(db_order)
+    await db.flush()
+
+    item_rows = _order_item_rows(order_data, db_order.id, product_map)
+    item_ids = []
+    if item_rows:
+        item_ids = (await db.scalars(_insert_items_stmt(), item_rows)).all()
+        await db.execute(_sales_rollup_stmt(db.bind.dialect.name), _sales_rollup_rows(db_order.created_at, item_rows))
+
+    created_order = _order_response(db_order, item_ids, item_rows)
+    await db.commit()
+
+    return created_order
+
+# --- Relatórios da ONG ---
+
+def sales_export_stmt(organization_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Select:
+    """
+    Itens vendidos pela ONG com dados do pedido e do produto, em ordem
+    cronológica. 'start' inclusivo, 'end' exclusivo; o período usa o índice
+    de orders.created_at.
+    """
+    stmt = (
+        select(
+            models.OrderItem.order_id, models.Order.created_at, models.OrderItem.id.label("order_item_id"),
+            models.OrderItem.product_id, models.Product.sku, models.Product.name.label("product_name"),
+            models.Product.category, models.OrderItem.quantity, models.OrderItem.price_at_purchase,
+        )
+        .join(models.Order, models.Order.id == models.OrderItem.order_id)
+        .join(models.Product, models.Product.id == models.OrderItem.product_id)
+        .where(models.OrderItem.organization_id == organization_id)
+    )
+    if start is not None:
+        stmt = stmt.where(models.Order.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(models.Order.created_at < end)
+    return stmt.order_by(models.Order.created_at, models.OrderItem.id)
+
+async def get_sales_summary_async(db: AsyncSession, organization_id: int, start: date, end: date) -> Sequence[Row]:
+    """
+    Vendas da ONG por dia e produto, lidas do resumo product_sales_daily
+    (datas inclusivas). O custo depende do período, não do número de pedidos.
+    """
+    rollup = models.ProductSalesDaily
+    return (await db.execute(
+        select(rollup.day, rollup.product_id, rollup.units, rollup.revenue)
+        .where(rollup.organization_id == organization_id, rollup.day >= start, rollup.day <= end)
+        .order_by(rollup.day, rollup.product_id)
+    )).all()
+
+def sales_rollup_source_stmt(dialect_name: str, organization_id: Optional[int] = None) -> Select:
+    """
+    O resumo product_sales_daily recalculado a partir de order_items, na
+    ordem da chave primária (reconstrução e conferência, ver sales_rollup).
+    """
+    day = _sales_day_expr(dialect_name)
+    item = models.OrderItem
+    stmt = (
+        select(
+            item.organization_id, day.label("day"), item.product_id,
+            func.sum(item.quantity).label("units"),
+            type_coerce(func.sum(item.quantity * item.price_at_purchase), Numeric(14, 2)).label("revenue"),
+        )
+        .join(models.Order, models.Order.id == item.order_id)
+        .group_by(item.organization_id, day, item.product_id)
+    )
+    if organization_id is not None:
+        stmt = stmt.where(item.organization_id == organization_id)
+    return stmt.order_by(item.organization_id, day, item.product_id)
+
+def _sales_day(created_at: datetime) -> date:
+    """ Dia (UTC) do pedido no resumo; o SQLite devolve o horário UTC sem fuso. """
+    return (created_at.astimezone(timezone.utc) if created_at.tzinfo else created_at).date()
 
-    # 4. Cria os Itens do Pedido (OrderItems)
-    items_to_add = []
+def _sales_day_expr(dialect_name: str):
+    """ O mesmo _sales_day, em SQL. """
+    if dialect_name == "postgresql":
+        return cast(func.timezone("UTC", models.Order.created_at), Date)
+    return type_coerce(func.date(models.Order.created_at), Date)
+
+# --- Partes do create_order compartilhadas pelas versões sync e async ---
+
+def _order_quantities(order_data: OrderCreate) -> dict:
+    quantities = defaultdict(int)
     for item in order_data.items:
-        product = product_map[item.product_id]
-        
-        db_item = models.OrderItem(
-            order_id=db_order.id,
-            product_id=product.id,
-            quantity=item.quantity,
-            price_at_purchase=product.price,
-            organization_id=product.organization_id 
+        quantities[item.product_id] += item.quantity
+    return quantities
+
+def _reserve_stock_stmt(product_id: int, quantity: int):
+    """ Baixa condicional do estoque; não retorna linha se não houver saldo. """
+    return (
+        update(models.Product)
+        .where(models.Product.id == product_id, models.Product.stock_qty >= quantity)
+        .values(stock_qty=models.Product.stock_qty - quantity)
+        .returning(models.Product.id, models.Product.price, models.Product.organization_id)
+        .execution_options(synchronize_session=False)
+    )
+
+def _product_exists_stmt(product_id: int) -> Select:
+    return select(models.Product.id).filter(models.Product.id == product_id)
+
+def _unavailable_error(product_id: int, exists: bool) -> HTTPException:
+    """ Diferencia produto inexistente (404) de estoque insuficiente (409). """
+    if not exists:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Produto com ID {product_id} não encontrado."
         )
-        items_to_add.append(db_item)
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Estoque insuficiente para o produto com ID {product_id}."
+    )
 
-    db.bulk_save_objects(items_to_add)
-    db.commit()
-    
-    # Recarrega o pedido com os itens associados
-    db_order = db.query(models.Order).options(
-        joinedload(models.Order.items) # Garante que os 'items' venham na resposta
-    ).filter(models.Order.id == db_order.id).first()
-    
-    return db_order
\ No newline at end of file
+def _order_item_rows(order_data: OrderCreate, order_id: int, product_map: dict) -> List[dict]:
+    item_rows = []
+    for item in order_data.items:
+        product = product_map[item.product_id]
+        item_rows.append({
+            "order_id": order_id,
+            "product_id": product.id,
+            "quantity": item.quantity,
+            "price_at_purchase": product.price,
+            "organization_id": product.organization_id,
+        })
+    return item_rows
+
+def _insert_items_stmt():
+    return insert(models.OrderItem).returning(models.OrderItem.id, sort_by_parameter_order=True)
+
+def _order_response(db_order: models.Order, item_ids: List[int], item_rows: List[dict]) -> OrderSchema:
+    return OrderSchema(
+        id=db_order.id,
+        created_at=db_order.created_at,
+        items=[
+            OrderItemSchema(id=item_id, **row)
+            for item_id, row in zip(item_ids, item_rows)
+        ]
+    )
+
+def _sales_rollup_stmt(dialect_name: str):
+    """ Soma unidades e receita à linha (ONG, dia, produto), criando-a se preciso. """
+    dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    table = models.ProductSalesDaily.__table__
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.organization_id, table.c.day, table.c.product_id],
+        set_={"units": table.c.units + stmt.excluded.units, "revenue": table.c.revenue + stmt.excluded.revenue},
+    )
+
+def _sales_rollup_rows(created_at: datetime, item_rows: List[dict]) -> List[dict]:
+    """ Uma linha por produto do pedido, em ordem de product_id (a ordem dos locks do estoque). """
+    day = _sales_day(created_at)
+    totals = {}
+    for row in item_rows:
+        key = (row["organization_id"], row["product_id"])
+        units, revenue = totals.get(key, (0, Decimal(0)))
+        totals[key] = (units + row["quantity"], revenue + row["quantity"] * row["price_at_purchase"])
+    return [
+        {"organization_id": organization_id, "day": day, "product_id": product_id, "units": units, "revenue": revenue}
+        for (organization_id, product_id), (units, revenue) in sorted(totals.items(), key=lambda item: item[0][1])
+    ]
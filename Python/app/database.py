@@ -1,18 +1,103 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 import os
 
+from .pool_metrics import pool_metrics, async_pool_metrics, replica_pool_metrics
+from .pool_metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool, InstrumentedReplicaQueuePool
+from . import metrics
+
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Opcional: réplica de leitura para o catálogo público (ver dependencies.get_async_read_db)
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+
+# Pool de conexões (por worker do uvicorn).
+# O threadpool do FastAPI roda até 40 handlers síncronos ao mesmo tempo; com o
+# pool padrão (5 + 10) o excedente fica esperando em get_db sem aparecer em
+# lugar nenhum. pool_size + max_overflow de todos os workers deve caber no
+# max_connections do PostgreSQL.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+# Segundos esperando uma conexão livre antes de falhar
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+# Recicla conexões antigas (ex: antes do idle timeout de proxies/firewalls)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+# Testa a conexão no checkout (descarta conexões mortas após restart do banco)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Esperas acima disso geram log de aviso (0 desliga)
+DB_POOL_SLOW_CHECKOUT_MS = float(os.getenv("DB_POOL_SLOW_CHECKOUT_MS", 100))
+
+
+# Drivers assíncronos usados pelas rotas async do portal público
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def _async_url(url: str) -> str:
+    """ Mesmo banco do DATABASE_URL, com o driver assíncrono (ex: postgresql+asyncpg). """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"Sem driver assíncrono configurado para '{parsed.get_backend_name()}'")
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+# Opcional: URL assíncrona explícita; por padrão derivada do DATABASE_URL
+DATABASE_ASYNC_URL = os.getenv("DATABASE_ASYNC_URL") or _async_url(DATABASE_URL)
 
-engine = create_engine(DATABASE_URL)
+
+def _engine_options(url: str, poolclass=InstrumentedQueuePool) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    # SQLite (desenvolvimento local) mantém o pool padrão do dialeto
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(
+            poolclass=poolclass,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    return options
+
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+pool_metrics.instrument(engine, slow_checkout_ms=DB_POOL_SLOW_CHECKOUT_MS)
+metrics.instrument_engine(engine, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Engine assíncrono: pool próprio, com os mesmos limites do síncrono (conta
+# em dobro no max_connections do PostgreSQL).
+# expire_on_commit=False: após o commit os objetos continuam legíveis sem
+# um novo SELECT (lazy load não é permitido em AsyncSession).
+async_engine = create_async_engine(DATABASE_ASYNC_URL, **_engine_options(DATABASE_ASYNC_URL, InstrumentedAsyncQueuePool))
+async_pool_metrics.instrument(async_engine.sync_engine, slow_checkout_ms=DB_POOL_SLOW_CHECKOUT_MS)
+metrics.instrument_engine(async_engine.sync_engine, "async")
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Réplica de leitura: sem DATABASE_READ_URL, as leituras usam o próprio primário.
+# No PostgreSQL as transações da réplica são READ ONLY (uma escrita por engano falha).
+if DATABASE_READ_URL:
+    _read_async_url = _async_url(DATABASE_READ_URL)
+    read_async_engine = create_async_engine(_read_async_url, **_engine_options(_read_async_url, InstrumentedReplicaQueuePool))
+    if read_async_engine.dialect.name == "postgresql":
+        read_async_engine = read_async_engine.execution_options(postgresql_readonly=True)
+    replica_pool_metrics.instrument(read_async_engine.sync_engine, slow_checkout_ms=DB_POOL_SLOW_CHECKOUT_MS)
+    metrics.instrument_engine(read_async_engine.sync_engine, "replica")
+else:
+    read_async_engine = async_engine
+AsyncReadSessionLocal = async_sessionmaker(read_async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
-# FastAPI 
+# FastAPI
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,9 +1,10 @@
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from sqlalchemy.orm import Session
-from . import schemas, crud, models, security
+from typing import Optional
+from . import schemas, crud, models, security, catalog_cache, database
 from .database import get_db
+import os
 import logging
 
 # Logger para debug de autenticação
@@ -12,33 +13,37 @@ logger = logging.getLogger("marketplace_api")
 # Define que a URL /auth/login é a que fornece o token
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user_data(token: str = Depends(oauth2_scheme)) -> schemas.TokenData:
+# Janela após uma escrita de produto em que as leituras públicas vão ao
+# primário (cobre o atraso de replicação e a recarga dos caches do catálogo)
+DB_READ_AFTER_WRITE_SECONDS = float(os.getenv("DB_READ_AFTER_WRITE_SECONDS", 5))
+
+def _token_data(token: str) -> Optional[schemas.TokenData]:
+    """ TokenData de um token válido (verificação cacheada em security), senão None. """
+    payload = security.decode_access_token(token)
+    if payload is None:
+        return None
+    user_id = payload.get("user_id")
+    organization_id = payload.get("org_id") # <-- CRÍTICO
+    if user_id is None or organization_id is None:
+        return None
+    return schemas.TokenData(user_id=user_id, organization_id=organization_id)
+
+async def get_current_user_data(token: str = Depends(oauth2_scheme)) -> schemas.TokenData:
     """
     Decodifica o token JWT e retorna os dados brutos (TokenData).
-    Levanta exceção se o token for inválido.
+    Levanta exceção se o token for inválido ou estiver expirado.
+    É async para rodar direto no event loop: a verificação é rápida (e
+    quase sempre vem do cache), não vale um salto para o threadpool.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Não foi possível validar as credenciais",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    try:
-        payload = jwt.decode(token, security.SECRET_KEY, algorithms=[security.ALGORITHM])
-        
-        user_id: int = payload.get("user_id")
-        organization_id: int = payload.get("org_id") # <-- CRÍTICO
-
-        if user_id is None or organization_id is None:
-            logger.warning("Token inválido: 'user_id' ou 'org_id' faltando no payload.")
-            raise credentials_exception
-        
-        token_data = schemas.TokenData(user_id=user_id, organization_id=organization_id)
-        
-    except JWTError as e:
-        logger.warning(f"Erro de JWT: {e}")
-        raise credentials_exception
-    
+    token_data = _token_data(token)
+    if token_data is None:
+        # A exceção só é montada no caminho de erro
+        logger.warning("Token inválido, expirado ou sem 'user_id'/'org_id'.")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Não foi possível validar as credenciais",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return token_data
 
 # --- Dependência CRÍTICA para Multi-Tenancy ---
@@ -46,31 +51,33 @@ def get_current_user_data(token: str = Depends(oauth2_scheme)) -> schemas.TokenD
 async def set_request_context(
     request: Request, 
     token_data: schemas.TokenData = Depends(get_current_user_data)
-):
+) -> schemas.TokenData:
     """
     Esta dependência injeta os IDs do token no estado da requisição.
     Isso é usado pelo middleware de log e pelas rotas restritas.
+    Declarada no router e em get_current_org_id, mas o FastAPI a executa
+    (e decodifica o token) uma única vez por requisição.
     """
     request.state.user_id = token_data.user_id
     request.state.organization_id = token_data.organization_id
+    return token_data
 
 async def get_current_org_id(
-    request: Request,
     # Esta dependência garante que o request.state seja preenchido
-    _ = Depends(set_request_context) 
+    token_data: schemas.TokenData = Depends(set_request_context)
 ) -> int:
     """
     Dependência principal para rotas restritas.
     
     Garante que o usuário está autenticado e retorna o 'organization_id'
-    armazenado de forma segura no token JWT (via request.state).
+    armazenado de forma segura no token JWT (validado em set_request_context).
     
     Qualquer endpoint que injetar esta dependência estará automaticamente
     protegido e ciente da ONG do usuário.
     """
     
-    # O valor foi definido por set_request_context
-    org_id = getattr(request.state, "organization_id", None)
+    # O valor foi validado por set_request_context
+    org_id = token_data.organization_id
     
     if org_id is None:
         # Isso não deve acontecer se 'set_request_context' rodou,
@@ -80,4 +87,34 @@ async def get_current_org_id(
             detail="Contexto da organização não encontrado na requisição.",
         )
         
-    return org_id
\ No newline at end of file
+    return org_id
+
+# --- Roteamento de leituras (réplica x primário) ---
+
+def get_optional_token_data(request: Request) -> Optional[schemas.TokenData]:
+    """
+    Para rotas públicas: dados do token se houver um Bearer válido, senão None.
+    Nunca levanta exceção (o front envia o token em todas as requisições).
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return _token_data(token)
+
+def reads_from_primary(request: Request) -> bool:
+    """
+    Read-your-writes: usuários de ONG autenticados (que podem ter acabado de
+    editar um produto em qualquer worker) e qualquer leitura logo após uma
+    escrita vista neste worker leem do primário. O resto vai para a réplica.
+    """
+    if database.read_async_engine is database.async_engine:
+        return True
+    if catalog_cache.seconds_since_write() < DB_READ_AFTER_WRITE_SECONDS:
+        return True
+    return get_optional_token_data(request) is not None
+
+async def get_async_read_db(request: Request):
+    """ AsyncSession somente leitura para o catálogo público (réplica quando configurada). """
+    session_factory = database.AsyncSessionLocal if reads_from_primary(request) else database.AsyncReadSessionLocal
+    async with session_factory() as db:
+        yield db
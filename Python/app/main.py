@@ -1,42 +1,26 @@
 from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import time
+import random
 import logging
-import sys
-import json
-from .database import engine, Base
+from sqlalchemy import exc as sa_exc
+from .database import engine, async_engine, read_async_engine, Base
+from .pool_metrics import pool_metrics, async_pool_metrics, replica_pool_metrics
 from .models import * # Importa os modelos para que o create_all os veja
 
 # Importa os routers de todos os blocos
 from .routers import auth, products, public
+from . import ai_search, pagination, structured_logging, metrics, sql_profiler, catalog_cache
 
 
 
 # Remove o handler padrão do FastAPI/Uvicorn
 logging.getLogger("uvicorn.access").handlers = []
 
-# Cria nosso logger estruturado
-class JsonLogFormatter(logging.Formatter):
-    def format(self, record):
-        log_record = {
-            "timestamp": self.formatTime(record, self.datefmt),
-            "level": record.levelname,
-            "message": record.getMessage(),
-            "module": record.module,
-            "funcName": record.funcName,
-        }
-        # Adiciona dados extras do middleware
-        if hasattr(record, "extra_data"):
-            log_record.update(record.extra_data)
-        return json.dumps(log_record)
-
-handler = logging.StreamHandler(sys.stdout)
-handler.setFormatter(JsonLogFormatter())
-
+# Logger estruturado: JSON escrito por uma thread de fundo (ver structured_logging)
+log_listener = structured_logging.configure_logging()
 logger = logging.getLogger("marketplace_api")
-logger.setLevel(logging.INFO)
-logger.addHandler(handler)
 # ---------------------------------------------------------
 
 
@@ -52,41 +36,155 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[pagination.NEXT_CURSOR_HEADER], # Lido pelo front na paginação por cursor
 )
 
-# iddleware de Logging
-@app.middleware("http")
-async def structured_log_middleware(request: Request, call_next):
-    start_time = time.time()
-    
-    response = await call_next(request)
-    
-    latency = time.time() - start_time
-    
-    # Tenta extrair IDs do contexto (preenchido pela dependência de auth)
-    user_id = getattr(request.state, "user_id", "anonymous")
-    organization_id = getattr(request.state, "organization_id", "none")
-
-    log_data = {
-        "extra_data": {
-            "http_method": request.method,
-            "http_path": request.url.path,
-            "http_status_code": response.status_code,
-            "http_latency_ms": round(latency * 1000, 2),
-            "user_id": user_id,
-            "organization_id": organization_id
+# Middleware de Logging
+# ASGI puro (sem @app.middleware("http")): o BaseHTTPMiddleware custa algumas
+# centenas de µs por requisição, mais que o próprio log.
+class StructuredLogMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500  # Se a aplicação falhar antes de responder
+        # Acumula as consultas ao banco desta requisição (ver metrics)
+        request_stats, stats_token = metrics.start_request(scope)
+        if sql_profiler.SQL_PROFILING:
+            request_stats.profile = sql_profiler.SqlProfile()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if request_stats.profile is not None:
+                    timing = sql_profiler.server_timing(
+                        request_stats.db_queries, request_stats.db_seconds, time.perf_counter() - start_time
+                    )
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", timing)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            latency = time.perf_counter() - start_time
+            metrics.finish_request(request_stats, stats_token, status_code, latency)
+            self.log_request(scope, status_code, latency * 1000, request_stats)
+
+    @staticmethod
+    def log_request(scope, status_code: int, latency_ms: float, request_stats: metrics.RequestStats):
+        profile = request_stats.profile
+        # Amostragem: sucessos rápidos entram com probabilidade
+        # LOG_SUCCESS_SAMPLE_RATE; erros, requisições lentas e o profiling de SQL, sempre
+        sample_rate = structured_logging.LOG_SUCCESS_SAMPLE_RATE
+        sampled = status_code < 400 and latency_ms < structured_logging.LOG_SLOW_REQUEST_MS and profile is None
+        if sampled and sample_rate < 1.0 and random.random() >= sample_rate:
+            return
+
+        # Tenta extrair IDs do contexto (request.state, preenchido pela dependência de auth)
+        state = scope.get("state") or {}
+        method, path = scope["method"], scope["path"]
+        log_data = {
+            "http_method": method,
+            "http_path": path,
+            "http_status_code": status_code,
+            "http_latency_ms": round(latency_ms, 2),
+            "user_id": state.get("user_id", "anonymous"),
+            "organization_id": state.get("organization_id", "none")
         }
-    }
-    
-    logger.info(f"HTTP Request: {request.method} {request.url.path}", extra=log_data)
-    
-    return response
+        if sampled and sample_rate < 1.0:
+            log_data["log_sample_rate"] = sample_rate  # Para reponderar contagens nas consultas
+        if profile is not None:
+            log_data["sql_query_count"] = request_stats.db_queries
+            log_data["sql_total_ms"] = round(request_stats.db_seconds * 1000, 3)
+            log_data["sql_slowest"] = profile.slowest()
+            sql_profiler.warn_repeated(profile, method, metrics.route_template(scope))
+
+        logger.info("HTTP Request: %s %s", method, path, extra={"extra_data": log_data})
+
+app.add_middleware(StructuredLogMiddleware)
+
+
+@app.on_event("startup")
+def warm_up_ai_model():
+    """ Cria o modelo da Busca AI no startup, fora do caminho das requisições. """
+    if ai_search.genai:
+        try:
+            ai_search._get_model()
+        except Exception as e:
+            logger.error(f"Falha ao inicializar o modelo da Busca AI: {e}")
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await async_engine.dispose()
+    if read_async_engine is not async_engine:
+        await read_async_engine.dispose()
+
+
+@app.exception_handler(sa_exc.TimeoutError)
+async def db_pool_timeout_handler(request: Request, exc: sa_exc.TimeoutError):
+    """ Pool de conexões esgotado: 503 em vez de erro 500 genérico. """
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Serviço sobrecarregado. Tente novamente em instantes."},
+        headers={"Retry-After": "1"},
+    )
 
 
 @app.get("/", summary="Health Check")
 def read_root():
     return {"status": "Marketplace API is running"}
 
+
+@app.get("/health/db-pool", summary="Métricas do pool de conexões do banco (deste worker)")
+async def read_db_pool_metrics():
+    # "async": pool do asyncpg, usado pelas rotas do portal público
+    metrics = {"sync": pool_metrics.snapshot(), "async": async_pool_metrics.snapshot()}
+    if read_async_engine is not async_engine:
+        metrics["replica"] = replica_pool_metrics.snapshot()
+    return metrics
+
+def _runtime_metrics():
+    """ Pools de conexões, cache do catálogo e fila de logs, lidos a cada /metrics. """
+    pools = {"sync": pool_metrics, "async": async_pool_metrics}
+    if read_async_engine is not async_engine:
+        pools["replica"] = replica_pool_metrics
+    snapshots = {name: pool.snapshot() for name, pool in pools.items()}
+    pool_gauges = (
+        ("db_pool_checked_out", "checked_out", "Conexões em uso."),
+        ("db_pool_overflow", "overflow", "Conexões acima de pool_size."),
+        ("db_pool_wait_p99_seconds", "wait_p99_ms", "p99 da espera por conexão (amostras recentes)."),
+    )
+    lines = []
+    for name, key, documentation in pool_gauges:
+        samples = [(("pool",), (pool,), data.get(key, 0) / (1000 if key.endswith("_ms") else 1))
+                   for pool, data in snapshots.items()]
+        lines.extend(metrics.sample_lines(name, documentation, samples))
+    lines.extend(metrics.sample_lines(
+        "db_pool_timeouts_total", "Timeouts esperando conexão.",
+        [(("pool",), (pool,), data["timeouts"]) for pool, data in snapshots.items()], kind="counter"))
+    lines.extend(metrics.sample_lines(
+        "catalog_product_list_cache_requests_total", "Consultas ao cache de /public/products (anônimas).",
+        [(("result",), ("hit",), catalog_cache.product_lists.hits),
+         (("result",), ("miss",), catalog_cache.product_lists.misses)], kind="counter"))
+    lines.extend(metrics.sample_lines(
+        "log_records_dropped_total", "Registros de log descartados por fila cheia.",
+        [((), (), structured_logging.dropped_records())], kind="counter"))
+    return lines
+
+metrics.registry.register_collector(_runtime_metrics)
+
+
+@app.get("/metrics", summary="Métricas no formato Prometheus (deste worker)", response_class=PlainTextResponse)
+async def read_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 # --- Registra os Routers de todos os blocos ---
 app.include_router(auth.router, prefix="/auth", tags=["Autenticação"])
 app.include_router(products.router, prefix="/products", tags=["Produtos (Área da ONG)"])
@@ -0,0 +1,283 @@
+import time
+import threading
+import contextvars
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+
+# Registro de métricas em memória (por worker), exposto em /metrics no
+# formato texto do Prometheus.
+#
+# - HTTP: contagem por status e histograma de latência, rotulados pelo
+#   template da rota ("/products/{product_id}"), nunca pelo path bruto.
+# - Banco: consultas e tempo por requisição, medidos nos eventos
+#   before/after_cursor_execute de todos os engines e somados na requisição
+#   corrente (contextvar aberto pelo middleware em main.py).
+# - Busca AI: origem da resposta, fallbacks por motivo e latência do Gemini.
+# Tudo que acontece dentro de uma requisição leva o organization_id do token
+# (ou "none" nas rotas públicas sem login).
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items(), key=lambda item: tuple(map(str, item[0])))
+        for labels, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por combinação de rótulos: [contagem por bucket (não acumulada)..., +Inf, soma]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(((k, list(v)) for k, v in self._series.items()), key=lambda item: tuple(map(str, item[0])))
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                bucket_labels = _labels(self.labelnames, labels, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], List[str]]) -> None:
+        """ Função chamada a cada /metrics, para valores lidos na hora (gauges). """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """ Zera as séries (usado pelos testes de carga). """
+        for metric in self._metrics:
+            metric.clear()
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    "http_requests_total", "Requisições HTTP por rota e status.",
+    ("method", "route", "status", "organization_id"))
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP (até o fim do corpo).",
+    ("method", "route", "organization_id"))
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries", "Consultas ao banco por requisição.",
+    ("method", "route", "organization_id"), buckets=COUNT_BUCKETS)
+http_request_db_seconds = registry.histogram(
+    "http_request_db_seconds", "Tempo no banco (soma das consultas) por requisição.",
+    ("method", "route", "organization_id"))
+db_queries_total = registry.counter(
+    "db_queries_total", "Consultas executadas por engine.", ("database",))
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds", "Duração de cada consulta ao banco.", ("database",))
+ai_search_requests_total = registry.counter(
+    "ai_search_requests_total", "Buscas AI por origem da resposta (rules, cache, llm) e resultado.",
+    ("source", "outcome", "organization_id"))
+ai_search_fallbacks_total = registry.counter(
+    "ai_search_fallbacks_total", "Buscas AI que caíram no fallback, por motivo.",
+    ("reason", "organization_id"))
+ai_search_llm_duration_seconds = registry.histogram(
+    "ai_search_llm_duration_seconds", "Latência das chamadas ao Gemini por resultado.",
+    ("outcome", "organization_id"))
+
+
+# --- Contexto da requisição ---
+
+class RequestStats:
+    """
+    Acumulado de uma requisição: consultas ao banco e estado (organization_id).
+    'profile' (sql_profiler.SqlProfile) só existe com SQL_PROFILING ligado.
+    """
+
+    __slots__ = ("scope", "db_queries", "db_seconds", "profile")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.profile = None
+
+    @property
+    def organization_id(self):
+        state = self.scope.get("state") if self.scope is not None else None
+        return state.get("organization_id", "none") if state else "none"
+
+
+_current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("metrics_request", default=None)
+
+
+def start_request(scope: dict) -> Tuple[RequestStats, contextvars.Token]:
+    """ Abre o acumulado da requisição (o contextvar chega ao threadpool e aos greenlets do SQLAlchemy). """
+    stats = RequestStats(scope)
+    return stats, _current_request.set(stats)
+
+
+def current_organization_id():
+    stats = _current_request.get()
+    return stats.organization_id if stats is not None else "none"
+
+
+def route_template(scope: dict) -> str:
+    """ Template da rota que atendeu a requisição ("unmatched" para 404 de roteamento). """
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def finish_request(stats: RequestStats, token: contextvars.Token, status_code: int, seconds: float) -> None:
+    _current_request.reset(token)
+    scope = stats.scope
+    labels = (scope["method"], route_template(scope), stats.organization_id)
+    http_requests_total.inc(labels[0], labels[1], str(status_code), labels[2])
+    http_request_duration_seconds.observe(seconds, *labels)
+    http_request_db_queries.observe(stats.db_queries, *labels)
+    http_request_db_seconds.observe(stats.db_seconds, *labels)
+
+
+# --- Banco ---
+
+def instrument_engine(engine, database: str) -> None:
+    """ Conta e cronometra as consultas do engine (síncrono ou o sync_engine de um AsyncEngine). """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        db_queries_total.inc(database)
+        db_query_duration_seconds.observe(elapsed, database)
+        stats = _current_request.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_seconds += elapsed
+            if stats.profile is not None:
+                stats.profile.record(statement, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        # Consulta que falhou não passa pelo after_cursor_execute
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("metrics_query_start"):
+            conn.info["metrics_query_start"].pop()
+
+
+# --- Busca AI ---
+
+# Motivos de fallback com cardinalidade fixa (o erro bruto vai só para o log)
+AI_FALLBACK_REASONS = {"timeout": "timeout", "overloaded": "overloaded",
+                       "circuit open": "circuit_open", "AI not configured": "not_configured"}
+
+
+def observe_ai_lookup(source: str, result: dict) -> None:
+    organization_id = current_organization_id()
+    if "error" in result:
+        ai_search_requests_total.inc(source, "fallback", organization_id)
+        ai_search_fallbacks_total.inc(AI_FALLBACK_REASONS.get(result["error"], "error"), organization_id)
+    else:
+        ai_search_requests_total.inc(source, "success", organization_id)
+
+
+def observe_ai_llm_call(outcome: str, seconds: float) -> None:
+    ai_search_llm_duration_seconds.observe(seconds, outcome, current_organization_id())
+
+
+# --- Gauges lidos na hora ---
+
+def sample_lines(name: str, documentation: str, samples: Iterable[Tuple[Tuple[str, ...], Tuple, float]],
+                 kind: str = "gauge") -> List[str]:
+    """ Linhas de uma métrica lida na hora: samples = [(nomes dos rótulos, valores, valor)]. """
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labelnames, labels, value in samples:
+        lines.append(f"{name}{_labels(labelnames, labels)} {_number(value)}")
+    return lines
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Numeric
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Boolean, Numeric, Index, DDL, event, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
+from . import search_index
 
 class Organization(Base):
     """ Define a ONG """
@@ -34,23 +35,49 @@ class Product(Base):
     image_url = Column(String)
     stock_qty = Column(Integer, nullable=False)
     weight_grams = Column(Integer, nullable=False)
+    # Código do produto no sistema da ONG (importação em lote); único por ONG
+    sku = Column(String(64))
     
     organization_id = Column(Integer, ForeignKey("organizations.id"))
     organization = relationship("Organization", back_populates="products")
 
+    __table_args__ = (
+        # Paginação por cursor (keyset) em (sort_key, id)
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_organization_id_id", "organization_id", "id"),
+        # Alvo do upsert da importação (ON CONFLICT); SKU nulo não conflita
+        Index("uq_products_organization_id_sku", "organization_id", "sku", unique=True),
+        # Índice trigram da busca por categoria (apenas PostgreSQL, ver search_index.py)
+        Index(
+            "ix_products_category_trgm",
+            text(f"{search_index.PRODUCT_CATEGORY_SQL} gin_trgm_ops"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+# Extensões/funções exigidas pela busca textual, criadas antes da tabela,
+# e a coluna 'search_vector' (não mapeada) com seu índice GIN, criados depois.
+for _statement in search_index.SETUP_STATEMENTS:
+    event.listen(Product.__table__, "before_create", DDL(_statement).execute_if(dialect="postgresql"))
+for _statement in search_index.COLUMN_STATEMENTS:
+    event.listen(Product.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+
 class Order(Base):
     """ Estrutura do Pedido (Dados Gerais) """
     __tablename__ = "orders"
     id = Column(Integer, primary_key=True, index=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True) # Filtro por período (exportação de vendas)
     
     items = relationship("OrderItem", back_populates="order")
 
+    # O INSERT já devolve created_at (RETURNING), evitando um SELECT extra
+    __mapper_args__ = {"eager_defaults": True}
+
 class OrderItem(Base):
     """ Itens do Pedido """
     __tablename__ = "order_items"
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
     product_id = Column(Integer, ForeignKey("products.id"))
     quantity = Column(Integer)
     price_at_purchase = Column(Numeric(10, 2)) 
@@ -58,4 +85,14 @@ class OrderItem(Base):
 
     order = relationship("Order", back_populates="items")
     product = relationship("Product")
-    organization = relationship("Organization", back_populates="order_items")
\ No newline at end of file
+    organization = relationship("Organization", back_populates="order_items")
+
+class ProductSalesDaily(Base):
+    """ Vendas por produto por dia (UTC), mantidas pelo create_order (painel da ONG) """
+    __tablename__ = "product_sales_daily"
+    # Chave primária na ordem da consulta do painel: ONG + período
+    organization_id = Column(Integer, ForeignKey("organizations.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    units = Column(Integer, nullable=False)
+    revenue = Column(Numeric(14, 2), nullable=False)
@@ -0,0 +1,98 @@
+import json
+import base64
+import binascii
+from decimal import Decimal, InvalidOperation
+from typing import Optional, Sequence, Tuple, Union
+
+from fastapi import HTTPException, status
+from sqlalchemy import Row, tuple_
+from sqlalchemy.orm import Query
+from sqlalchemy.sql import Select
+
+from . import models
+
+# Aceita tanto db.query(...) quanto select(...)
+Statement = Union[Query, Select]
+# Entidades ORM ou linhas só com as colunas do schema (serialization.PRODUCT_COLUMNS)
+ProductLike = Union[models.Product, Row]
+
+# Paginação por cursor (keyset).
+# Em vez de OFFSET, cada página continua a partir do último (sort_key, id)
+# visto, usando os índices compostos (price, id) e (organization_id, id).
+# O cursor é opaco para o cliente: base64 de um JSON pequeno.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Ordenações com suporte a cursor: nome -> (coluna de ordenação, descendente?)
+SORTS = {
+    "id": (None, False),
+    "price": (models.Product.price, False),
+    "-price": (models.Product.price, True),
+}
+
+# Ordenação por relevância da busca textual: só com skip/limit, pois a
+# relevância não é uma chave estável para keyset.
+RELEVANCE = "relevance"
+
+
+def resolve_sort(sort: Optional[str], search: Optional[str]) -> str:
+    """ Sem ordenação explícita, buscas são ordenadas por relevância e o resto por id. """
+    if sort:
+        return sort
+    return RELEVANCE if search else "id"
+
+
+def encode_cursor(sort: str, product: ProductLike) -> str:
+    column, _ = SORTS[sort]
+    key = None if column is None else getattr(product, column.key)
+    if isinstance(key, Decimal):
+        key = str(key)
+    payload = json.dumps({"s": sort, "k": key, "i": product.id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Optional[Decimal], int]:
+    """ Retorna (sort_key, id) do cursor. Cursor inválido -> 400. """
+    if sort not in SORTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Paginação por cursor não disponível para esta ordenação."
+        )
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["s"] != sort:
+            raise ValueError("cursor de outra ordenação")
+        key = None if SORTS[sort][0] is None else Decimal(payload["k"])
+        return key, int(payload["i"])
+    except (ValueError, KeyError, TypeError, InvalidOperation, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido."
+        )
+
+
+def order_query(query: Statement, sort: str) -> Statement:
+    """ Aplica a ordenação estável (sort_key, id). """
+    column, descending = SORTS.get(sort, (None, False))
+    id_column = models.Product.id.desc() if descending else models.Product.id
+    if column is None:
+        return query.order_by(id_column)
+    return query.order_by(column.desc() if descending else column, id_column)
+
+
+def seek_query(query: Statement, sort: str, cursor: str) -> Statement:
+    """ Filtra as linhas depois do cursor, na mesma ordem de order_query. """
+    key, last_id = decode_cursor(cursor, sort)
+    column, descending = SORTS[sort]
+    if column is None:
+        return query.filter(models.Product.id > last_id)
+    row, after = tuple_(column, models.Product.id), tuple_(key, last_id)
+    return query.filter(row < after if descending else row > after)
+
+
+def next_cursor(items: Sequence[ProductLike], sort: str, limit: int) -> Optional[str]:
+    """ Cursor da próxima página, ou None se esta página não veio cheia. """
+    if sort not in SORTS or not items or len(items) < limit:
+        return None
+    return encode_cursor(sort, items[-1])
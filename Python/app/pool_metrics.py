@@ -0,0 +1,152 @@
+import time
+import logging
+import threading
+from collections import deque
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+logger = logging.getLogger("marketplace_api")
+
+# Métricas do pool de conexões do banco (por worker).
+#
+# - Espera no checkout: medida nos pools Instrumented* (o SQLAlchemy não tem
+#   evento "antes do checkout"); é o tempo que a requisição ficou parada
+#   esperando uma conexão livre.
+# - Conexões em uso, overflow e timeouts: eventos do pool + contadores do
+#   próprio QueuePool.
+
+
+class PoolMetrics:
+    def __init__(self, samples: int = 1000):
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self.slow_checkout_ms = 0.0
+        self._waits = deque(maxlen=samples)  # segundos, amostras recentes
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._engine = None
+        self._lock = threading.Lock()
+
+    def observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._waits.append(seconds)
+            self._wait_total += seconds
+            self._wait_max = max(self._wait_max, seconds)
+            slow = self.slow_checkout_ms and seconds * 1000 >= self.slow_checkout_ms
+            if slow:
+                self.slow_checkouts += 1
+        if slow:
+            logger.warning("Espera alta por conexão do banco", extra={"extra_data": {
+                "db_pool_wait_ms": round(seconds * 1000, 2),
+                **self._pool_state(),
+            }})
+
+    def observe_timeout(self, seconds: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+        logger.error("Timeout ao obter conexão do banco", extra={"extra_data": {
+            "db_pool_wait_ms": round(seconds * 1000, 2),
+            **self._pool_state(),
+        }})
+
+    def _pool_state(self) -> dict:
+        pool = self._engine.pool if self._engine is not None else None  # engine.dispose() troca o pool
+        if not isinstance(pool, QueuePool):  # Inclui o AsyncAdaptedQueuePool
+            return {}
+        return {
+            "db_pool_size": pool.size(),
+            "db_pool_checked_out": pool.checkedout(),
+            "db_pool_overflow": max(0, pool.overflow()),
+        }
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            data = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "slow_checkouts": self.slow_checkouts,
+                "wait_avg_ms": round(self._wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 3),
+            }
+        for label, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+            value = waits[min(len(waits) - 1, int(len(waits) * q))] if waits else 0.0
+            data[f"wait_{label}_ms"] = round(value * 1000, 3)
+        data.update({key.removeprefix("db_pool_"): value for key, value in self._pool_state().items()})
+        return data
+
+    def reset(self) -> None:
+        """ Zera os contadores (usado pelos testes de carga). """
+        with self._lock:
+            self.checkouts = self.checkins = self.connects = 0
+            self.invalidations = self.timeouts = self.slow_checkouts = 0
+            self._waits.clear()
+            self._wait_total = self._wait_max = 0.0
+
+    def instrument(self, engine, slow_checkout_ms: float = 0.0) -> None:
+        """ Liga as métricas aos eventos do pool do engine. """
+        self._engine = engine
+        self.slow_checkout_ms = slow_checkout_ms
+
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(engine, "checkout")
+        def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+            with self._lock:
+                self.checkouts += 1
+
+        @event.listens_for(engine, "checkin")
+        def _on_checkin(dbapi_connection, connection_record):
+            with self._lock:
+                self.checkins += 1
+
+        @event.listens_for(engine, "invalidate")
+        def _on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+
+pool_metrics = PoolMetrics()
+# Pool do engine assíncrono (asyncpg), usado pelas rotas async do portal público
+async_pool_metrics = PoolMetrics()
+# Pool da réplica de leitura (DATABASE_READ_URL), quando configurada
+replica_pool_metrics = PoolMetrics()
+
+
+class _TimedCheckout:
+    """ Mede quanto tempo cada checkout esperou por uma conexão. """
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.observe_timeout(time.perf_counter() - started)
+            raise
+        self.metrics.observe_wait(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    metrics = pool_metrics
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics = async_pool_metrics
+
+
+class InstrumentedReplicaQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics = replica_pool_metrics
@@ -0,0 +1,191 @@
+import os
+import csv
+import codecs
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from . import schemas, serialization
+
+# Importação em lote de produtos (POST /products/import).
+#
+# O corpo da requisição (CSV com cabeçalho ou NDJSON, um objeto por linha) é
+# lido como stream: o arquivo nunca fica inteiro em memória, só um lote de
+# PRODUCT_IMPORT_CHUNK_SIZE linhas por vez. Cada lote é validado contra
+# schemas.ProductImportRow e gravado com upsert por (organization_id, sku)
+# em crud.upsert_org_products_async, com commit por lote. Linhas inválidas
+# não interrompem a importação: vão para o relatório de erros.
+
+PRODUCT_IMPORT_CHUNK_SIZE = int(os.getenv("PRODUCT_IMPORT_CHUNK_SIZE", 1000))
+PRODUCT_IMPORT_MAX_ERRORS = int(os.getenv("PRODUCT_IMPORT_MAX_ERRORS", 1000))
+
+CSV_CONTENT_TYPES = {"text/csv", "application/csv"}
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"}
+REQUIRED_COLUMNS = tuple(
+    name for name, field in schemas.ProductImportRow.model_fields.items() if field.is_required()
+)
+
+# Linha lida do arquivo: (número da linha no arquivo, objeto ou mensagem de erro de parsing).
+# A numeração é a do editor de texto: conta o cabeçalho e as linhas em branco.
+RawRow = Tuple[int, Union[dict, str]]
+
+
+class ImportFileError(ValueError):
+    """ Arquivo ilegível como um todo (codificação, cabeçalho); vira 400 na rota. """
+
+
+def import_format(content_type: Optional[str]) -> Optional[str]:
+    """ "csv", "ndjson" ou None (formato não suportado) a partir do Content-Type. """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in CSV_CONTENT_TYPES:
+        return "csv"
+    if media_type in NDJSON_CONTENT_TYPES:
+        return "ndjson"
+    return None
+
+
+async def _line_batches(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[str]]:
+    """ Linhas completas (com o '\\n') de cada pedaço recebido; a linha partida espera o próximo. """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    try:
+        async for chunk in chunks:
+            lines = (pending + decoder.decode(chunk)).split("\n")
+            pending = lines.pop()
+            if lines:
+                yield [line + "\n" for line in lines]
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise ImportFileError("O arquivo deve estar em UTF-8.")
+    if pending:
+        yield [pending]
+
+
+async def _csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[Tuple[int, str]]]:
+    """
+    Registros CSV completos, com o número da linha em que começam. Um campo
+    entre aspas pode conter quebras de linha: o registro só termina quando o
+    número de aspas fica par.
+    """
+    partial = ""
+    partial_start = 0
+    line_number = 0
+    async for lines in _line_batches(chunks):
+        records = []
+        for line in lines:
+            line_number += 1
+            if partial:
+                partial += line
+                if partial.count('"') % 2 == 0:
+                    records.append((partial_start, partial))
+                    partial = ""
+            elif line.count('"') % 2:
+                partial, partial_start = line, line_number
+            else:
+                records.append((line_number, line))
+        yield records
+    if partial:
+        yield [(partial_start, partial)]  # Aspas sem fechar: o csv lê o que houver e a validação aponta o erro
+
+
+async def _csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[RawRow]]:
+    header = None
+    async for records in _csv_records(chunks):
+        rows = []
+        # Cada registro completo vira exatamente uma linha do csv.reader
+        for (row_number, _), values in zip(records, csv.reader(record for _, record in records)):
+            if not values or values == [""]:
+                continue  # Linha em branco
+            if header is None:
+                header = [name.strip().lower() for name in values]
+                missing = [name for name in REQUIRED_COLUMNS if name not in header]
+                if missing:
+                    raise ImportFileError(f"Colunas obrigatórias ausentes no cabeçalho: {', '.join(missing)}")
+                continue
+            # Campo vazio = ausente (ex: description e image_url opcionais)
+            rows.append((row_number, {name: value for name, value in zip(header, values) if value != ""}))
+        yield rows
+    if header is None:
+        raise ImportFileError("Arquivo vazio: o CSV precisa de um cabeçalho.")
+
+
+async def _ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[RawRow]]:
+    row_number = 0
+    async for lines in _line_batches(chunks):
+        rows = []
+        for line in lines:
+            row_number += 1
+            if not line.strip():
+                continue
+            try:
+                value = serialization.loads(line)
+            except ValueError as e:
+                rows.append((row_number, f"JSON inválido: {e}"))
+                continue
+            rows.append((row_number, value if isinstance(value, dict) else "A linha deve ser um objeto JSON"))
+        yield rows
+
+
+async def read_chunks(chunks: AsyncIterator[bytes], file_format: str) -> AsyncIterator[List[RawRow]]:
+    """ Linhas do arquivo em lotes de PRODUCT_IMPORT_CHUNK_SIZE, conforme o corpo chega. """
+    reader = _csv_rows if file_format == "csv" else _ndjson_rows
+    batch: List[RawRow] = []
+    async for rows in reader(chunks):
+        batch.extend(rows)
+        while len(batch) >= PRODUCT_IMPORT_CHUNK_SIZE:
+            yield batch[:PRODUCT_IMPORT_CHUNK_SIZE]
+            batch = batch[PRODUCT_IMPORT_CHUNK_SIZE:]
+    if batch:
+        yield batch
+
+
+def _error_messages(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(map(str, item['loc'])) or 'linha'}: {item['msg']}" for item in error.errors()]
+
+
+class ImportReport:
+    """ Totais da importação e os primeiros PRODUCT_IMPORT_MAX_ERRORS erros. """
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[schemas.ProductImportError] = []
+
+    def _fail(self, row: int, sku: Optional[str], messages: List[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < PRODUCT_IMPORT_MAX_ERRORS:
+            self.errors.append(schemas.ProductImportError(row=row, sku=sku, errors=messages))
+
+    def validate(self, rows: List[RawRow]) -> List[schemas.ProductImportRow]:
+        """ Linhas válidas do lote; as demais entram no relatório. """
+        valid = []
+        for row_number, value in rows:
+            if isinstance(value, str):
+                self._fail(row_number, None, [value])
+                continue
+            try:
+                valid.append(schemas.ProductImportRow.model_validate(value))
+            except ValidationError as e:
+                sku = value.get("sku")
+                self._fail(row_number, sku if isinstance(sku, str) else None, _error_messages(e))
+        return valid
+
+    def add_written(self, written: int, created: int) -> None:
+        """ 'written': produtos gravados no lote, já sem SKUs repetidos. """
+        self.created += created
+        self.updated += written - created
+
+    def result(self) -> schemas.ProductImportResult:
+        return schemas.ProductImportResult(
+            created=self.created,
+            updated=self.updated,
+            failed=self.failed,
+            errors=self.errors,
+            errors_truncated=self.failed > len(self.errors),
+        )
+
+
+def summary(report: ImportReport) -> Dict[str, int]:
+    """ Campos de log da importação. """
+    return {"import_created": report.created, "import_updated": report.updated, "import_failed": report.failed}
@@ -1,23 +1,42 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
+import logging
 
 from .. import crud, schemas, security
-from ..database import get_db
+from ..database import get_async_db
 
 router = APIRouter()
 
+logger = logging.getLogger("marketplace_api")
+
 @router.post("/login", response_model=schemas.Token)
 async def login_for_access_token(
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
     """
     Endpoint de login. Recebe email (no campo 'username') e senha.
     Retorna um Access Token JWT.
+    A verificação da senha (bcrypt) roda num pool limitado de threads;
+    com a fila cheia, responde 429 sem consultar o banco.
     """
-    user = crud.authenticate_user(db, email=form_data.username, password=form_data.password)
+    if not security.acquire_login_slot():
+        logger.warning("Login recusado: fila de verificação de senha cheia", extra={"extra_data": {
+            "login_max_concurrency": security.LOGIN_MAX_CONCURRENCY,
+            "login_max_pending": security.LOGIN_MAX_PENDING,
+        }})
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Muitas tentativas de login. Tente novamente em instantes.",
+            headers={"Retry-After": "1"},
+        )
+
+    try:
+        user = await crud.authenticate_user_async(db, email=form_data.username, password=form_data.password)
+    finally:
+        security.release_login_slot()
     
     if not user:
         raise HTTPException(
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Literal
+import datetime
+import logging
 
-from .. import crud, schemas, models
-from ..database import get_db
+from .. import crud, schemas, models, pagination, serialization, product_import, sales_export, sales_rollup
+from ..database import get_db, get_async_db
 from ..dependencies import get_current_org_id, set_request_context
 
 router = APIRouter(
@@ -13,6 +17,9 @@ router = APIRouter(
     dependencies=[Depends(set_request_context)] 
 )
 
+# Logger específico para este módulo
+logger = logging.getLogger("marketplace_api")
+
 @router.post("/", response_model=schemas.Product, status_code=status.HTTP_201_CREATED)
 def create_product(
     product: schemas.ProductCreate,
@@ -27,18 +34,106 @@ def create_product(
     """
     return crud.create_org_product(db=db, product=product, organization_id=org_id)
 
+@router.post("/import", response_model=schemas.ProductImportResult)
+async def import_products(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    org_id: int = Depends(get_current_org_id)
+):
+    """
+    Importação em lote para a ONG autenticada, com upsert pelo 'sku'.
+    Corpo: CSV com cabeçalho (Content-Type: text/csv) ou NDJSON, um produto
+    por linha (Content-Type: application/x-ndjson). Colunas: as de
+    ProductCreate mais 'sku'; 'organization_id' vem sempre do token.
+    O arquivo é lido como stream e gravado em lotes (commit por lote);
+    linhas inválidas são puladas e listadas no relatório.
+    """
+    file_format = product_import.import_format(request.headers.get("content-type"))
+    if file_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Envie o arquivo como text/csv ou application/x-ndjson.",
+        )
+
+    report = product_import.ImportReport()
+    try:
+        async for chunk in product_import.read_chunks(request.stream(), file_format):
+            rows = report.validate(chunk)
+            if rows:
+                written, created = await crud.upsert_org_products_async(db, rows, organization_id=org_id)
+                report.add_written(written, created)
+    except product_import.ImportFileError as e:
+        # Lotes anteriores já foram gravados (commit por lote)
+        logger.warning(f"Importação interrompida: {e}", extra={"extra_data": product_import.summary(report)})
+        written = report.created + report.updated
+        detail = f"{e} {written} produto(s) já gravado(s) antes do erro." if written else str(e)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+    logger.info("Importação de produtos concluída", extra={"extra_data": product_import.summary(report)})
+    return report.result()
+
+@router.get("/sales/export", response_class=StreamingResponse)
+async def export_sales(
+    file_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    org_id: int = Depends(get_current_org_id)
+):
+    """
+    Exporta as vendas (itens de pedido) da ONG autenticada, em ordem
+    cronológica, como CSV ou NDJSON. 'start' e 'end' são datas (UTC),
+    ambas inclusivas. O arquivo é gerado em stream a partir de um cursor
+    no banco: pode ter qualquer tamanho sem pesar na memória do servidor.
+    """
+    if start and end and start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'start' deve ser anterior ou igual a 'end'.")
+    return StreamingResponse(
+        sales_export.stream_sales(org_id, start, end, file_format),
+        media_type=sales_export.MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{sales_export.filename(org_id, start, end, file_format)}"'},
+    )
+
+@router.get("/sales/summary", response_model=schemas.SalesSummary)
+async def sales_summary(
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    db: AsyncSession = Depends(get_async_db),
+    org_id: int = Depends(get_current_org_id)
+):
+    """
+    Painel de vendas da ONG autenticada: unidades e receita por produto por
+    dia, mais os totais do período. 'start' e 'end' são datas (UTC), ambas
+    inclusivas; o padrão são os últimos SALES_SUMMARY_DEFAULT_DAYS dias.
+    Lê o resumo product_sales_daily (mantido a cada pedido), então o tempo
+    de resposta não cresce com o histórico de pedidos.
+    """
+    try:
+        start, end = sales_rollup.period(start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    rows = await crud.get_sales_summary_async(db, organization_id=org_id, start=start, end=end)
+    return sales_rollup.summary(start, end, rows)
+
 @router.get("/", response_model=List[schemas.Product])
 def read_org_products(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     org_id: int = Depends(get_current_org_id)
 ):
     """
     Lista todos os produtos da ONG autenticada.
+    Aceita skip/limit ou 'cursor' (valor do header X-Next-Cursor da página anterior).
+    Lê só as colunas do schema e devolve o JSON pronto (ver serialization);
+    o response_model fica para a documentação.
     """
-    products = crud.get_products_by_org(db, organization_id=org_id, skip=skip, limit=limit)
-    return products
+    rows = crud.get_product_rows_by_org(db, organization_id=org_id, skip=skip, limit=limit, cursor=cursor)
+    response = Response(content=serialization.product_rows_json(rows), media_type="application/json")
+    next_cursor = pagination.next_cursor(rows, "id", limit)
+    if next_cursor:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = next_cursor
+    return response
 
 @router.get("/{product_id}", response_model=schemas.Product)
 def read_product(
@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Literal
 from decimal import Decimal
 import logging
 
 from .. import crud, schemas, models
-from ..database import get_db
-from .. import ai_search
+from ..database import get_async_db
+from ..dependencies import get_async_read_db, get_optional_token_data
+from .. import ai_search, pagination, catalog_cache, serialization
 
 router = APIRouter(
     tags=["Portal Público"]
@@ -15,36 +16,101 @@ router = APIRouter(
 # Logger específico para este módulo
 logger = logging.getLogger("marketplace_api")
 
+# As rotas deste módulo são async e usam AsyncSession (asyncpg): uma consulta
+# em andamento não prende uma thread do threadpool.
+# Leituras do catálogo usam get_async_read_db (réplica, se configurada);
+# pedidos usam get_async_db (sempre o primário).
+
 @router.get("/products", response_model=List[schemas.Product])
-def read_public_products(
+async def read_public_products(
+    request: Request,
     skip: int = 0,
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=100), # Faz parte da chave do cache das páginas: precisa de teto
     category: Optional[str] = None,
     price_min: Optional[Decimal] = None,
     price_max: Optional[Decimal] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    sort: Optional[Literal["id", "price", "-price", "relevance"]] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Endpoint principal do catálogo público.
     - Lista produtos de todas as ONGs.
     - Suporta filtros manuais (categoria, preço).
     - Suporta busca simples por texto (usado pelo fallback da AI).
+    - Paginação por skip/limit ou por cursor: quando há próxima página, o
+      header X-Next-Cursor traz o valor a ser enviado em 'cursor'.
+    - Visitantes anônimos recebem páginas do cache (invalidado nas escritas
+      de produto); toda resposta tem ETag forte e responde 304 a If-None-Match.
+      Com token de ONG (read-your-writes), sempre consulta o banco.
     """
-    products = crud.get_public_products(
-        db, skip, limit, category, price_min, price_max, search
-    )
-    return products
+    resolved_sort = pagination.resolve_sort(sort, search)
+    cacheable = get_optional_token_data(request) is None
+    key = catalog_cache.product_list_key(skip, limit, category, price_min, price_max, search, resolved_sort, cursor)
+    entry = catalog_cache.product_lists.get(key) if cacheable else None
+
+    if entry is None:
+        version = catalog_cache.current_version()  # Antes da consulta (ver ProductListCache.set)
+        # Só as colunas do schema, serializadas direto para bytes (ver serialization)
+        rows = await crud.get_public_product_rows_async(
+            db, skip, limit, category, price_min, price_max, search, sort, cursor
+        )
+        body = serialization.product_rows_json(rows)
+        entry = catalog_cache.ProductListEntry(body, pagination.next_cursor(rows, resolved_sort, limit))
+        if cacheable:
+            catalog_cache.product_lists.set(key, entry, version)
+
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": (
+            f"public, max-age={catalog_cache.PRODUCT_LIST_CACHE_MAX_AGE_SECONDS}" if cacheable else "private, no-cache"
+        ),
+    }
+    if entry.next_cursor:
+        headers[pagination.NEXT_CURSOR_HEADER] = entry.next_cursor
+    if catalog_cache.etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+async def _cached_categories(db: AsyncSession) -> catalog_cache.CategoryEntry:
+    return await catalog_cache.categories.get_async(lambda: crud.get_category_counts_async(db))
+
+def _conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Preenche ETag/Cache-Control e retorna um 304 se o cliente já tiver esta versão.
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={catalog_cache.CATEGORY_CACHE_MAX_AGE_SECONDS}",
+    }
+    if catalog_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
 
 @router.get("/categories", response_model=List[str])
-def read_categories(db: Session = Depends(get_db)):
-    """ Retorna uma lista de categorias únicas para o front-end usar nos filtros. """
-    return crud.get_all_categories(db)
+async def read_categories(request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Retorna uma lista de categorias únicas para o front-end usar nos filtros.
+    Servido do cache (invalidado nas escritas de produto), com ETag/304.
+    """
+    entry = await _cached_categories(db)
+    not_modified = _conditional_response(request, response, entry.names_etag)
+    return not_modified or entry.names
+
+@router.get("/categories/counts", response_model=List[schemas.CategoryCount])
+async def read_category_counts(request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db)):
+    """ Categorias com a quantidade de produtos de cada uma (mesmo cache de /categories). """
+    entry = await _cached_categories(db)
+    not_modified = _conditional_response(request, response, entry.counts_etag)
+    return not_modified or entry.counts
 
 @router.post("/search-ai", response_model=schemas.AISearchResult)
-def search_with_ai(
+async def search_with_ai(
     query: schemas.AISearchQuery,
-    request: Request
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Endpoint da "Busca Inteligente".
@@ -54,8 +120,11 @@ def search_with_ai(
     # Log de entrada (conforme requisito)
     log_extra = {"input_text": query.query}
     
-    # 1. Tenta parsear com a AI
-    ai_result = ai_search.parse_search_query(query.query)
+    # 1. Tenta parsear (regras locais -> cache -> AI)
+    categories = (await _cached_categories(db)).names
+    ai_result = await ai_search.parse_search_query_async(
+        query.query, categories=categories, log_extra=log_extra
+    )
     
     interpretation = ""
     applied_filters = {}
@@ -107,19 +176,20 @@ def search_with_ai(
     )
 
 @router.post("/orders", response_model=schemas.Order, status_code=status.HTTP_201_CREATED)
-def create_new_order(
+async def create_new_order(
     order: schemas.OrderCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Recebe um carrinho (lista de produtos e quantidades) e cria um Pedido.
-    (Etapa 1: Sem validação de estoque ou pagamento)
+    Baixa o estoque na mesma transação; 409 se algum produto não tiver saldo.
+    (Sem pagamento)
     """
     try:
-        created_order = crud.create_order(db=db, order_data=order)
+        created_order = await crud.create_order_async(db=db, order_data=order)
         return created_order
     except HTTPException as e:
-        # Repassa a exceção do CRUD (ex: Produto não encontrado)
+        # Repassa a exceção do CRUD (ex: Produto não encontrado, sem estoque)
         raise e
     except Exception as e:
         logger.error(f"Erro inesperado ao criar pedido: {e}")
@@ -0,0 +1,66 @@
+import os
+import io
+import csv
+import datetime
+from typing import AsyncIterator, Optional, Sequence, Tuple
+
+from . import crud, database, serialization
+
+# Exportação de vendas da ONG (GET /products/sales/export).
+#
+# As linhas saem do banco por cursor do lado do servidor (yield_per /
+# stream: lotes de SALES_EXPORT_BATCH_SIZE) e cada lote é escrito no
+# corpo da resposta assim que chega, então a memória do worker não cresce
+# com o tamanho do histórico. A sessão é aberta dentro do gerador e vive
+# enquanto o corpo é enviado (uma conexão do pool durante o download); as
+# leituras vão para a réplica, se configurada.
+
+SALES_EXPORT_BATCH_SIZE = int(os.getenv("SALES_EXPORT_BATCH_SIZE", 1000))
+
+SALES_EXPORT_FIELDS = (
+    "order_id", "created_at", "order_item_id", "product_id", "sku", "product_name",
+    "category", "quantity", "price_at_purchase", "total",
+)
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}  # O Starlette acrescenta o charset em text/*
+
+
+def day_range(start: Optional[datetime.date], end: Optional[datetime.date]) -> Tuple[Optional[datetime.datetime], Optional[datetime.datetime]]:
+    """ Datas inclusivas (UTC) -> intervalo [início, fim) em datetime. """
+    begin = datetime.datetime.combine(start, datetime.time.min, datetime.timezone.utc) if start else None
+    finish = datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min, datetime.timezone.utc) if end else None
+    return begin, finish
+
+
+def filename(organization_id: int, start: Optional[datetime.date], end: Optional[datetime.date], file_format: str) -> str:
+    period = f"{start or 'inicio'}_{end or 'hoje'}"
+    return f"vendas-ong{organization_id}-{period}.{file_format}"
+
+
+def _export_row(row) -> tuple:
+    total = row.price_at_purchase * row.quantity if row.price_at_purchase is not None and row.quantity is not None else None
+    created_at = row.created_at.isoformat() if row.created_at is not None else None
+    return (row.order_id, created_at, row.order_item_id, row.product_id, row.sku, row.product_name,
+            row.category, row.quantity, row.price_at_purchase, total)
+
+
+def _csv_batch(rows: Sequence) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(_export_row(row) for row in rows)
+    return buffer.getvalue().encode()
+
+
+def _ndjson_batch(rows: Sequence) -> bytes:
+    return b"".join(serialization.dumps(dict(zip(SALES_EXPORT_FIELDS, _export_row(row)))) + b"\n" for row in rows)
+
+
+async def stream_sales(organization_id: int, start: Optional[datetime.date], end: Optional[datetime.date],
+                       file_format: str) -> AsyncIterator[bytes]:
+    """ Corpo da exportação, um pedaço por lote do cursor. """
+    stmt = crud.sales_export_stmt(organization_id, *day_range(start, end))
+    encode = _csv_batch if file_format == "csv" else _ndjson_batch
+    if file_format == "csv":
+        yield (",".join(SALES_EXPORT_FIELDS) + "\r\n").encode()
+    async with database.AsyncReadSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=SALES_EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield encode(rows)
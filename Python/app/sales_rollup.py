@@ -0,0 +1,153 @@
+"""
+Resumo de vendas por produto por dia (tabela product_sales_daily).
+
+O crud.create_order soma cada pedido ao resumo na mesma transação do pedido;
+o painel da ONG (GET /products/sales/summary) lê só o resumo, sem agregar
+order_items. Este módulo também confere o resumo contra order_items e o
+reconstrói (ex: depois do seed sintético, que grava pedidos direto no banco,
+ou de correções manuais em pedidos).
+
+Uso (a partir da pasta Python/):
+    python -m app.sales_rollup check [--org ID]
+    python -m app.sales_rollup rebuild [--org ID]
+"""
+import os
+import sys
+import time
+import argparse
+import datetime
+from decimal import Decimal
+from typing import Iterator, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, insert, select, text
+
+from . import crud, models, schemas
+from .database import engine
+
+# Período do painel quando 'start' não é informado, e o maior aceito
+SALES_SUMMARY_DEFAULT_DAYS = int(os.getenv("SALES_SUMMARY_DEFAULT_DAYS", 30))
+SALES_SUMMARY_MAX_DAYS = int(os.getenv("SALES_SUMMARY_MAX_DAYS", 366))
+# Linhas por lote lidas de cada lado na conferência
+SALES_ROLLUP_CHECK_BATCH_SIZE = 5000
+
+# (organization_id, day, product_id) e (units, revenue) de uma linha do resumo
+Key = Tuple[int, datetime.date, int]
+Totals = Tuple[int, Decimal]
+
+
+def period(start: Optional[datetime.date], end: Optional[datetime.date]) -> Tuple[datetime.date, datetime.date]:
+    """ Datas do painel com os padrões aplicados; ValueError se o período for inválido. """
+    end = end or datetime.datetime.now(datetime.timezone.utc).date()
+    start = start or end - datetime.timedelta(days=SALES_SUMMARY_DEFAULT_DAYS - 1)
+    if start > end:
+        raise ValueError("'start' deve ser anterior ou igual a 'end'.")
+    if (end - start).days + 1 > SALES_SUMMARY_MAX_DAYS:
+        raise ValueError(f"O período do painel é limitado a {SALES_SUMMARY_MAX_DAYS} dias.")
+    return start, end
+
+
+def summary(start: datetime.date, end: datetime.date, rows: Sequence) -> schemas.SalesSummary:
+    days = [schemas.ProductSalesDay(**row._mapping) for row in rows]
+    return schemas.SalesSummary(
+        start=start,
+        end=end,
+        units=sum(day.units for day in days),
+        revenue=sum((day.revenue for day in days), Decimal("0.00")),
+        days=days,
+    )
+
+
+def rebuild(organization_id: Optional[int] = None) -> int:
+    """
+    Recria o resumo (de uma ONG ou de todas) a partir de order_items, numa
+    transação. No PostgreSQL a tabela fica travada para os upserts dos
+    checkouts até o commit: os pedidos concorrentes esperam e entram depois,
+    por cima do resumo reconstruído. Retorna o número de linhas gravadas.
+    """
+    rollup = models.ProductSalesDaily.__table__
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(f"LOCK TABLE {rollup.name} IN SHARE ROW EXCLUSIVE MODE"))
+        stmt = delete(rollup)
+        if organization_id is not None:
+            stmt = stmt.where(rollup.c.organization_id == organization_id)
+        conn.execute(stmt)
+        source = crud.sales_rollup_source_stmt(conn.dialect.name, organization_id).order_by(None)
+        result = conn.execute(insert(rollup).from_select(
+            ["organization_id", "day", "product_id", "units", "revenue"], source
+        ))
+        return result.rowcount
+
+
+def _keyed(rows) -> Iterator[Tuple[Key, Totals]]:
+    for row in rows:
+        yield (row.organization_id, row.day, row.product_id), (row.units, row.revenue)
+
+
+def differences(organization_id: Optional[int] = None) -> Iterator[Tuple[Key, Optional[Totals], Optional[Totals]]]:
+    """
+    (chave, esperado, gravado) de cada linha em que o resumo diverge de
+    order_items; None = linha ausente. As duas consultas vêm ordenadas pela
+    chave e são comparadas em stream (memória constante), cada uma na sua
+    conexão: um pedido gravado entre as duas leituras pode aparecer como
+    divergência; rode de novo para confirmar.
+    """
+    rollup = models.ProductSalesDaily
+    stored_stmt = select(rollup.organization_id, rollup.day, rollup.product_id, rollup.units, rollup.revenue)
+    if organization_id is not None:
+        stored_stmt = stored_stmt.where(rollup.organization_id == organization_id)
+    stored_stmt = stored_stmt.order_by(rollup.organization_id, rollup.day, rollup.product_id)
+
+    with engine.connect() as source_conn, engine.connect() as rollup_conn:
+        expected = _keyed(source_conn.execution_options(yield_per=SALES_ROLLUP_CHECK_BATCH_SIZE).execute(
+            crud.sales_rollup_source_stmt(engine.dialect.name, organization_id)
+        ))
+        stored = _keyed(rollup_conn.execution_options(yield_per=SALES_ROLLUP_CHECK_BATCH_SIZE).execute(stored_stmt))
+        want, got = next(expected, None), next(stored, None)
+        while want is not None or got is not None:
+            if got is None or (want is not None and want[0] < got[0]):
+                yield want[0], want[1], None
+                want = next(expected, None)
+            elif want is None or got[0] < want[0]:
+                yield got[0], None, got[1]
+                got = next(stored, None)
+            else:
+                if want[1] != got[1]:
+                    yield want[0], want[1], got[1]
+                want, got = next(expected, None), next(stored, None)
+
+
+def _describe(totals: Optional[Totals]) -> str:
+    return "ausente" if totals is None else f"{totals[0]} un / {totals[1]}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("action", choices=("check", "rebuild"))
+    parser.add_argument("--org", type=int, help="Só esta ONG (padrão: todas)")
+    parser.add_argument("--show", type=int, default=20, help="Divergências listadas pelo check")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.action == "rebuild":
+        rows = rebuild(args.org)
+        print(f"Resumo reconstruído: {rows} linhas em {time.perf_counter() - started:.1f}s")
+        return 0
+
+    found = 0
+    for (organization_id, day, product_id), expected, stored in differences(args.org):
+        found += 1
+        if found <= args.show:
+            print(f"ONG {organization_id} | {day} | produto {product_id}: "
+                  f"order_items {_describe(expected)}, resumo {_describe(stored)}")
+    elapsed = time.perf_counter() - started
+    if found:
+        org_option = f" --org {args.org}" if args.org is not None else ""
+        print(f"{found} divergência(s) em {elapsed:.1f}s; corrija com: python -m app.sales_rollup rebuild{org_option}")
+        return 1
+    print(f"Resumo confere com order_items ({elapsed:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 from decimal import Decimal
 import datetime
@@ -49,11 +49,46 @@ class Product(ProductBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ProductImportRow(ProductCreate):
+    """ Linha do arquivo de importação: o SKU identifica o produto dentro da ONG. """
+    sku: str = Field(min_length=1, max_length=64)
+
+class ProductImportError(BaseModel):
+    row: int # Linha no arquivo, a partir de 1 (conta o cabeçalho do CSV e as linhas em branco)
+    sku: Optional[str] = None
+    errors: List[str]
+
+class ProductImportResult(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    errors: List[ProductImportError] # Limitado a PRODUCT_IMPORT_MAX_ERRORS itens
+    errors_truncated: bool = False
+
+class CategoryCount(BaseModel):
+    category: str
+    product_count: int
+
+class ProductSalesDay(BaseModel):
+    day: datetime.date
+    product_id: int
+    units: int
+    revenue: Decimal
+
+class SalesSummary(BaseModel):
+    """ Painel de vendas da ONG no período (datas UTC inclusivas). """
+    start: datetime.date
+    end: datetime.date
+    units: int
+    revenue: Decimal
+    days: List[ProductSalesDay] # Por dia e produto, em ordem cronológica
+
+
 # --- Pedidos (Portal Público - Bloco 4) ---
 
 class OrderItemCreate(BaseModel):
     product_id: int
-    quantity: int
+    quantity: int = Field(gt=0) # Quantidade negativa "devolveria" estoque
 
 class OrderCreate(BaseModel):
     items: List[OrderItemCreate]
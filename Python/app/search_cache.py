@@ -0,0 +1,108 @@
+import os
+import json
+import logging
+import unicodedata
+from typing import Optional
+
+from .ttl_cache import InMemoryTTLCache
+
+logger = logging.getLogger("marketplace_api")
+
+# Configuração do cache (lida do .env)
+AI_SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("AI_SEARCH_CACHE_MAX_ENTRIES", 1024))
+AI_SEARCH_CACHE_TTL_SECONDS = float(os.getenv("AI_SEARCH_CACHE_TTL_SECONDS", 3600))
+AI_SEARCH_CACHE_REDIS_URL = os.getenv("AI_SEARCH_CACHE_REDIS_URL")
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normaliza a consulta para usar como chave do cache:
+    caixa baixa (casefold), sem acentos e com espaços colapsados.
+    Ex: "  Café  até 50 REAIS " -> "cafe ate 50 reais"
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(without_accents.split())
+
+
+class RedisCacheBackend:
+    """
+    Backend compartilhado (opcional) para que vários workers do uvicorn
+    reaproveitem os mesmos resultados. O TTL e a eviction ficam a cargo do Redis.
+    """
+
+    def __init__(self, url: str, ttl_seconds: float, prefix: str = "ai_search:"):
+        import redis  # Dependência opcional
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self.evictions = 0  # Gerenciado pelo Redis; mantido para manter a interface
+
+    def get(self, key: str) -> Optional[dict]:
+        raw = self._client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: dict) -> None:
+        self._client.set(self.prefix + key, json.dumps(value), ex=int(self.ttl_seconds))
+
+    def clear(self) -> None:
+        for key in self._client.scan_iter(self.prefix + "*"):
+            self._client.delete(key)
+
+
+class SearchCache:
+    """
+    Cache de resultados da Busca AI com contadores de hit/miss/eviction.
+    O backend é plugável: qualquer objeto com get/set/clear serve.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str) -> Optional[dict]:
+        try:
+            value = self.backend.get(normalize_query(text))
+        except Exception as e:
+            # Um backend compartilhado fora do ar não pode derrubar a busca
+            logger.warning(f"AI Search cache indisponível: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(value)  # Cópia: quem chama pode alterar o dicionário
+
+    def set(self, text: str, filters: dict) -> None:
+        # Resultados de fallback nunca são tratados como respostas reais
+        if "error" in filters:
+            return
+        try:
+            self.backend.set(normalize_query(text), dict(filters))
+        except Exception as e:
+            logger.warning(f"AI Search cache indisponível: {e}")
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        """ Contadores para o log estruturado. """
+        return {
+            "ai_cache_hits": self.hits,
+            "ai_cache_misses": self.misses,
+            "ai_cache_evictions": self.backend.evictions,
+        }
+
+
+def _build_backend():
+    if AI_SEARCH_CACHE_REDIS_URL:
+        try:
+            return RedisCacheBackend(AI_SEARCH_CACHE_REDIS_URL, AI_SEARCH_CACHE_TTL_SECONDS)
+        except ImportError:
+            logger.warning("Pacote 'redis' não instalado. Usando cache AI local ao processo.")
+    return InMemoryTTLCache(AI_SEARCH_CACHE_MAX_ENTRIES, AI_SEARCH_CACHE_TTL_SECONDS)
+
+
+search_cache = SearchCache(_build_backend())
@@ -0,0 +1,72 @@
+from sqlalchemy import func, literal_column
+from sqlalchemy.sql.elements import ColumnElement
+
+# Busca textual do catálogo (PostgreSQL).
+#
+# - 'portuguese_unaccent': configuração de text search com stemming em
+#   português e sem acentos ("cerâmica" encontra "ceramica" e vice-versa).
+# - Coluna 'search_vector' (tsvector de name + description) GENERATED ... STORED
+#   com índice GIN: o próprio PostgreSQL a mantém sincronizada em todo
+#   INSERT/UPDATE de produto, e o ts_rank lê o vetor pronto em vez de
+#   recalculá-lo para cada linha encontrada. A coluna não é mapeada no ORM.
+# - Índice trigram (pg_trgm) em unaccent(lower(category)) para o filtro de
+#   categoria por substring, também sem acentos.
+#
+# Em outros bancos (ex: SQLite nos testes locais) o crud mantém o ILIKE.
+
+SEARCH_CONFIG = "portuguese_unaccent"
+
+PRODUCT_DOCUMENT_SQL = "coalesce(name, '') || ' ' || coalesce(description, '')"
+PRODUCT_SEARCH_VECTOR_SQL = f"to_tsvector('{SEARCH_CONFIG}'::regconfig, {PRODUCT_DOCUMENT_SQL})"
+PRODUCT_CATEGORY_SQL = "immutable_unaccent(lower(category))"
+SEARCH_VECTOR_COLUMN = "search_vector"
+
+# Pré-requisitos (idempotentes) dos índices
+SETUP_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # unaccent() não é IMMUTABLE, então não pode ser usado em índices diretamente
+    """
+    CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text AS
+    $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    """,
+    f"""
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{SEARCH_CONFIG}') THEN
+            CREATE TEXT SEARCH CONFIGURATION {SEARCH_CONFIG} (COPY = portuguese);
+            ALTER TEXT SEARCH CONFIGURATION {SEARCH_CONFIG}
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+        END IF;
+    END
+    $$
+    """,
+]
+
+# Executados depois do CREATE TABLE products
+COLUMN_STATEMENTS = [
+    f"""
+    ALTER TABLE products ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR_COLUMN} tsvector
+    GENERATED ALWAYS AS ({PRODUCT_SEARCH_VECTOR_SQL}) STORED
+    """,
+    f"CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING gin ({SEARCH_VECTOR_COLUMN})",
+]
+
+TEARDOWN_STATEMENTS = [
+    f"DROP TEXT SEARCH CONFIGURATION IF EXISTS {SEARCH_CONFIG}",
+    "DROP FUNCTION IF EXISTS immutable_unaccent(text)",
+]
+
+
+def product_search_vector() -> ColumnElement:
+    return literal_column(f"products.{SEARCH_VECTOR_COLUMN}")
+
+
+def product_search_query(term: str) -> ColumnElement:
+    """ Converte o texto do usuário em tsquery (aceita aspas, OR e '-'). """
+    return func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), term)
+
+
+def product_category_expr() -> ColumnElement:
+    return literal_column(PRODUCT_CATEGORY_SQL)
@@ -0,0 +1,131 @@
+import re
+from typing import Iterable, Optional
+
+from .search_cache import normalize_query
+
+# Pré-parser determinístico da Busca AI.
+# Resolve localmente as consultas simples (uma categoria conhecida, uma faixa
+# de preço, uma palavra-chave) e devolve o mesmo dicionário de filtros que o
+# LLM devolveria. Consultas ambíguas retornam None e seguem para o Gemini.
+
+_NUMBER = r"(\d+(?:[.,]\d+)*)"
+_CURRENCY = r"(?:r\$\s*)?"
+_REAIS = r"(?:\s*(?:reais|real|r\$))?"
+
+# Ordem importa: as faixas ("entre X e Y") vêm antes dos limites simples
+_PRICE_PATTERNS = [
+    ("range", re.compile(rf"\bentre\s+{_CURRENCY}{_NUMBER}{_REAIS}\s+e\s+{_CURRENCY}{_NUMBER}{_REAIS}")),
+    ("range", re.compile(rf"\bde\s+{_CURRENCY}{_NUMBER}{_REAIS}\s+(?:a|at[eé])\s+{_CURRENCY}{_NUMBER}{_REAIS}")),
+    ("max", re.compile(rf"\b(?:at[eé]|abaixo\s+de|menos\s+de|por\s+menos\s+de|no\s+m[aá]ximo|m[aá]ximo(?:\s+de)?)\s+{_CURRENCY}{_NUMBER}{_REAIS}")),
+    ("min", re.compile(rf"\b(?:acima\s+de|mais\s+de|a\s+partir\s+de|no\s+m[ií]nimo|m[ií]nimo(?:\s+de)?|desde)\s+{_CURRENCY}{_NUMBER}{_REAIS}")),
+]
+
+# Palavras de ligação que sobram depois de remover a expressão de preço
+_FILLER_WORDS = {"de", "do", "da", "dos", "das", "com", "por", "e", "preco", "precos", "valor", "custando", "que", "custe", "custem"}
+
+# Vocabulário de preço: se sobrar no texto, a expressão não foi entendida
+_PRICE_WORDS = {
+    "ate", "entre", "abaixo", "acima", "menos", "mais", "partir", "minimo", "maximo", "desde",
+    "r$", "reais", "real",
+}
+
+_CURRENCY_MARKER = re.compile(r"r\$|\breais\b|\breal\b")
+# Palavra logo depois do número ("mais de 3 cores": 'cores' é o que se conta, não reais)
+_NEXT_WORD = re.compile(r"\s*([^\W\d_]+)")
+_ONLY_NUMBER = re.compile(r"[\d.,]+")
+
+_TOKEN_SPLIT = re.compile(r"[\s,;!?]+")
+
+
+def _to_number(raw: str):
+    """ Converte '1.234,50' / '49,90' / '50' para int ou float. """
+    if "," in raw:
+        raw = raw.replace(".", "").replace(",", ".")
+    elif re.fullmatch(r"\d{1,3}(?:\.\d{3})+", raw):
+        raw = raw.replace(".", "")  # Separador de milhar
+    value = float(raw)
+    return int(value) if value.is_integer() else value
+
+
+def _is_price(match: re.Match, text: str) -> bool:
+    """
+    Número com R$/reais é preço; sem marcador, só se nenhum substantivo vem
+    depois ("até 50" sim, "até 2 anos" e "mais de 3 cores" não).
+    """
+    if _CURRENCY_MARKER.search(match.group(0)):
+        return True
+    following = _NEXT_WORD.match(text, match.end())
+    return following is None or normalize_query(following.group(1)) in _FILLER_WORDS
+
+
+def _extract_price(text: str):
+    """
+    Retorna (filtros de preço, texto restante sem as expressões de preço),
+    ou None se um número pode não ser preço (a consulta vai para o LLM).
+    """
+    filters = {}
+    for kind, pattern in _PRICE_PATTERNS:
+        match = pattern.search(text)
+        if not match:
+            continue
+        if not _is_price(match, text):
+            return None
+        numbers = [_to_number(g) for g in match.groups()]
+        if kind == "range":
+            low, high = sorted(numbers)
+            filters.update(price_min=low, price_max=high)
+        elif kind == "max":
+            filters.setdefault("price_max", numbers[0])
+        else:
+            filters.setdefault("price_min", numbers[0])
+        text = text[:match.start()] + " " + text[match.end():]
+    return filters, text
+
+
+def _singular(word: str) -> str:
+    return word[:-1] if word.endswith("s") else word
+
+
+def _match_category(term: str, categories: Iterable[str]) -> Optional[str]:
+    normalized = normalize_query(term)
+    for category in categories:
+        candidate = normalize_query(category)
+        if normalized == candidate or _singular(normalized) == _singular(candidate):
+            return category
+    return None
+
+
+def parse_simple_query(text: str, categories: Iterable[str] = ()) -> Optional[dict]:
+    """
+    Tenta resolver a consulta sem o LLM.
+    Retorna o dicionário de filtros (category, price_min, price_max, keywords)
+    ou None quando a consulta é ambígua e deve ser enviada ao Gemini.
+    """
+    lowered = " ".join(text.lower().split())
+    if not lowered:
+        return None
+
+    extracted = _extract_price(lowered)
+    if extracted is None:
+        return None
+    filters, remainder = extracted
+
+    words = [w for w in _TOKEN_SPLIT.split(remainder) if w]
+    words = [w for w in words if normalize_query(w) not in _FILLER_WORDS]
+    if not words:
+        return filters or None
+    # Sobras de preço ("até" sozinho) ou números soltos ("1.000", "chocolate 50"): o LLM interpreta
+    if any(normalize_query(w) in _PRICE_WORDS or _ONLY_NUMBER.fullmatch(w) for w in words):
+        return None
+
+    term = " ".join(words)
+    category = _match_category(term, categories)
+    if category:
+        filters["category"] = category
+        return filters
+    if len(words) == 1:
+        filters["keywords"] = term
+        return filters
+
+    # Mais de uma palavra sem categoria conhecida: deixa o LLM interpretar
+    return None
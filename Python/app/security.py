@@ -3,20 +3,74 @@ from typing import Optional
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 import os
+import time
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from .ttl_cache import InMemoryTTLCache
 
 # --- Configuração de Hashing de Senha ---
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Verificação de senha fora do event loop: o bcrypt gasta dezenas/centenas
+# de ms de CPU (e libera o GIL), então roda num pool pequeno de threads.
+# LOGIN_MAX_CONCURRENCY limita os bcrypt simultâneos; com mais de
+# LOGIN_MAX_PENDING logins esperando na fila, o login responde 429 na hora
+# (protege o worker em rajadas de credential stuffing).
+LOGIN_MAX_CONCURRENCY = int(os.getenv("LOGIN_MAX_CONCURRENCY", 2))
+LOGIN_MAX_PENDING = int(os.getenv("LOGIN_MAX_PENDING", 16))
+_password_executor = ThreadPoolExecutor(max_workers=LOGIN_MAX_CONCURRENCY, thread_name_prefix="bcrypt")
+_logins_in_flight = 0  # Só alterado no event loop, dispensa lock
+
 # --- Configuração do JWT (lido do .env) ---
 SECRET_KEY = os.getenv("SECRET_KEY", "uma_chave_secreta_padrao_mude_isso")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
 
+# Cache de tokens já verificados (por worker), chaveado pelo hash do token.
+# Uma entrada nunca vale além do 'exp' do próprio token.
+AUTH_TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_TOKEN_CACHE_MAX_ENTRIES", 1024))
+AUTH_TOKEN_CACHE_TTL_SECONDS = float(os.getenv("AUTH_TOKEN_CACHE_TTL_SECONDS", 300))
+_verified_tokens = InMemoryTTLCache(AUTH_TOKEN_CACHE_MAX_ENTRIES, AUTH_TOKEN_CACHE_TTL_SECONDS)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica se a senha plana corresponde ao hash."""
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_password_or_dummy(plain_password: str, hashed_password: Optional[str]) -> bool:
+    """
+    Como verify_password, mas para usuário inexistente (hash None) faz um
+    bcrypt de mentira: o tempo de resposta não revela se o email existe.
+    """
+    if hashed_password is None:
+        pwd_context.dummy_verify()
+        return False
+    return verify_password(plain_password, hashed_password)
+
+def acquire_login_slot() -> bool:
+    """
+    Reserva uma vaga para um login (da consulta ao banco até o fim do bcrypt).
+    False quando a fila está cheia: responder 429. Liberar com release_login_slot.
+    """
+    global _logins_in_flight
+    if _logins_in_flight >= LOGIN_MAX_CONCURRENCY + LOGIN_MAX_PENDING:
+        return False
+    _logins_in_flight += 1
+    return True
+
+def release_login_slot() -> None:
+    global _logins_in_flight
+    _logins_in_flight -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: Optional[str]) -> bool:
+    """ verify_password_or_dummy no pool de threads do bcrypt, sem bloquear o event loop. """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_executor, verify_password_or_dummy, plain_password, hashed_password
+    )
+
 def get_password_hash(password: str) -> str:
     """Gera o hash de uma senha."""
     return pwd_context.hash(password)
@@ -34,4 +88,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+def decode_access_token(token: str) -> Optional[dict]:
+    """
+    Retorna o payload do token se a assinatura e o 'exp' forem válidos, senão None.
+    Tokens válidos ficam no cache; inválidos não (não enchem o cache).
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    payload = _verified_tokens.get(key)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return None
+        if "exp" in payload:
+            _verified_tokens.set(key, payload)
+    elif payload["exp"] <= time.time():
+        return None  # Expirou enquanto estava no cache
+    return payload
@@ -0,0 +1,45 @@
+import json
+from decimal import Decimal
+from typing import Iterable, Sequence
+
+from . import models, schemas
+
+try:
+    import orjson  # Opcional: bem mais rápido que o json da stdlib
+except ImportError:
+    orjson = None
+
+# Caminho rápido das listagens de produto.
+#
+# As rotas de lista selecionam só as colunas de schemas.Product (linhas, sem
+# montar entidades ORM) e serializam direto para bytes JSON, sem validar
+# objeto por objeto com o response_model. A saída é idêntica à do
+# response_model: mesmos campos, mesma ordem, Decimal como string ("10.00").
+
+# Campos na ordem do schema; PRODUCT_COLUMNS segue a mesma ordem
+PRODUCT_FIELDS = tuple(schemas.Product.model_fields)
+PRODUCT_COLUMNS = tuple(getattr(models.Product, field) for field in PRODUCT_FIELDS)
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return str(value)  # Igual ao Pydantic: preserva a escala (Numeric(10, 2))
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def product_rows_json(rows: Iterable[Sequence]) -> bytes:
+    """ Linhas de PRODUCT_COLUMNS -> JSON de List[schemas.Product]. """
+    return dumps([dict(zip(PRODUCT_FIELDS, row)) for row in rows])
+
+
+def loads(data):
+    """ JSON (bytes ou str) -> objetos Python; usado na importação NDJSON. """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
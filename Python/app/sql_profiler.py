@@ -0,0 +1,88 @@
+import os
+import re
+import heapq
+import logging
+from collections import Counter
+from typing import List, Tuple
+
+logger = logging.getLogger("marketplace_api")
+
+# Profiling de SQL por requisição (opt-in, para desenvolvimento/diagnóstico).
+#
+# Com SQL_PROFILING=true, cada requisição guarda a forma de cada consulta
+# (parâmetros e listas de IN colapsados) e as mais lentas. O middleware de
+# log (main.py) acrescenta ao log da requisição a contagem, o tempo total e
+# as consultas mais lentas, responde com o header Server-Timing e avisa
+# quando a mesma forma se repete mais de SQL_N_PLUS_ONE_THRESHOLD vezes
+# (o padrão típico de N+1 ao serializar relacionamentos lazy).
+# Contagem e tempo vêm dos mesmos eventos usados por metrics.
+
+SQL_PROFILING = os.getenv("SQL_PROFILING", "false").lower() in ("1", "true", "yes")
+SQL_PROFILE_SLOWEST = int(os.getenv("SQL_PROFILE_SLOWEST", 3))
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 10))
+# Consultas no log são cortadas neste tamanho
+SQL_PROFILE_STATEMENT_CHARS = 300
+
+# Placeholders dos drivers usados: ? (sqlite), %(nome)s / %s (psycopg2), $1 (asyncpg)
+_PLACEHOLDER = r"(?:\?|%\(\w+\)s|%s|\$\d+)"
+_PLACEHOLDER_LIST = re.compile(rf"{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+")
+_SINGLE_PLACEHOLDER = re.compile(_PLACEHOLDER)
+_VALUES_ROWS = re.compile(r"\(\?\.\.\.\)(?:\s*,\s*\(\?\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Consulta sem os valores: "IN (?, ?, ?)" e "IN ($1, $2)" viram "IN (?...)";
+    VALUES com várias linhas vira "VALUES (?...)...".
+    """
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _PLACEHOLDER_LIST.sub("?...", shape)
+    shape = _VALUES_ROWS.sub("(?...)...", shape)
+    return _SINGLE_PLACEHOLDER.sub("?", shape)
+
+
+class SqlProfile:
+    """ Consultas de uma requisição, agrupadas por forma. """
+
+    __slots__ = ("shapes", "_slowest")
+
+    def __init__(self):
+        self.shapes: Counter = Counter()
+        self._slowest: List[Tuple[float, str]] = []  # heap mínimo com as N mais lentas
+
+    def record(self, statement: str, seconds: float) -> None:
+        shape = statement_shape(statement)
+        self.shapes[shape] += 1
+        if len(self._slowest) < SQL_PROFILE_SLOWEST:
+            heapq.heappush(self._slowest, (seconds, shape))
+        elif self._slowest and seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (seconds, shape))
+
+    def slowest(self) -> List[dict]:
+        return [
+            {"ms": round(seconds * 1000, 3), "statement": shape[:SQL_PROFILE_STATEMENT_CHARS]}
+            for seconds, shape in sorted(self._slowest, reverse=True)
+        ]
+
+    def repeated(self) -> List[Tuple[str, int]]:
+        """ Formas executadas mais de SQL_N_PLUS_ONE_THRESHOLD vezes (suspeitas de N+1). """
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > SQL_N_PLUS_ONE_THRESHOLD]
+
+
+def server_timing(db_queries: int, db_seconds: float, total_seconds: float) -> bytes:
+    """ Valor do header Server-Timing: tempo no banco e total até o início da resposta. """
+    return (
+        f'db;dur={db_seconds * 1000:.2f};desc="{db_queries} queries", '
+        f'app;dur={total_seconds * 1000:.2f}'
+    ).encode("latin-1")
+
+
+def warn_repeated(profile: SqlProfile, method: str, route: str) -> None:
+    for shape, count in profile.repeated():
+        logger.warning("Possível N+1: mesma consulta repetida na requisição", extra={"extra_data": {
+            "http_method": method,
+            "http_route": route,
+            "sql_repeat_count": count,
+            "sql_statement": shape[:SQL_PROFILE_STATEMENT_CHARS],
+        }})
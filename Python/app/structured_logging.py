@@ -0,0 +1,105 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+from typing import Optional
+from logging.handlers import QueueHandler, QueueListener
+
+try:
+    import orjson  # Opcional: encoder JSON bem mais rápido que o json da stdlib
+except ImportError:
+    orjson = None
+
+# Logs estruturados (JSON, uma linha por evento) do logger "marketplace_api".
+#
+# As requisições só colocam o registro numa fila em memória; a formatação
+# JSON e a escrita no stdout acontecem numa thread de fundo (QueueListener).
+# Assim um stdout lento (pipe cheio, coletor de logs atrasado) não soma
+# latência às requisições. Com a fila cheia o registro é descartado e contado.
+
+# Registros aguardando escrita (por worker)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+# Fração dos logs de requisições bem-sucedidas (status < 400) que é escrita.
+# Erros e requisições lentas são sempre registrados.
+LOG_SUCCESS_SAMPLE_RATE = float(os.getenv("LOG_SUCCESS_SAMPLE_RATE", 1.0))
+# Requisições acima disso são sempre registradas, mesmo com amostragem
+LOG_SLOW_REQUEST_MS = float(os.getenv("LOG_SLOW_REQUEST_MS", 500))
+
+
+def _dumps(data: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(data, default=str).decode()
+    return json.dumps(data, default=str)
+
+
+class JsonLogFormatter(logging.Formatter):
+    def format(self, record):
+        log_record = {
+            "timestamp": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "module": record.module,
+            "funcName": record.funcName,
+        }
+        # Adiciona dados extras do middleware
+        if hasattr(record, "extra_data"):
+            log_record.update(record.extra_data)
+        return _dumps(log_record)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """ QueueHandler que descarta (e conta) registros quando a fila está cheia, sem bloquear. """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+_queue_handler: Optional[DroppingQueueHandler] = None
+# Listener em execução (None depois do stop_logging)
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(logger_name: str = "marketplace_api", stream=None) -> QueueListener:
+    """
+    Liga o logger à fila e inicia a thread que escreve no stream (stdout por
+    padrão). Chamado uma vez no import do app; no fim do processo (atexit)
+    o listener escreve o que restou na fila.
+    """
+    global _queue_handler, _listener
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonLogFormatter())
+
+    _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    logger = logging.getLogger(logger_name)
+    logger.setLevel(logging.INFO)
+    logger.addHandler(_queue_handler)
+
+    _listener = QueueListener(_queue_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def dropped_records() -> int:
+    """ Registros descartados por fila cheia desde o início do worker. """
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def stop_logging() -> None:
+    """ Para o listener (idempotente), escrevendo os registros pendentes. """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
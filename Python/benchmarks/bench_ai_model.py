@@ -0,0 +1,53 @@
+"""
+Micro-benchmark: custo por chamada de montar o GenerativeModel da Busca AI.
+
+Compara o comportamento antigo (um GenerativeModel novo por requisição)
+com o modelo compartilhado de ai_search._get_model(). Não faz chamadas de
+rede: mede apenas a alocação/configuração que antecede o generate_content.
+
+Uso (a partir da pasta Python/):
+    python -m benchmarks.bench_ai_model --iterations 2000
+"""
+import os
+import argparse
+import timeit
+
+# Uma chave fictícia basta: nenhuma requisição é enviada ao Gemini
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-dummy-key")
+
+from app import ai_search  # noqa: E402
+
+
+def per_call_us(func, iterations: int) -> float:
+    return min(timeit.repeat(func, number=iterations, repeat=5)) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    if not ai_search.genai:
+        raise SystemExit("Pacote 'google-generativeai' não disponível.")
+
+    def old_path():
+        # Reproduz o código anterior: modelo e schema montados a cada chamada
+        ai_search.genai.GenerativeModel(
+            model_name=ai_search.AI_SEARCH_MODEL_NAME,
+            system_instruction=ai_search.AI_SYSTEM_PROMPT.replace(
+                ai_search.AI_RESPONSE_SCHEMA_JSON, ai_search.json.dumps(ai_search.AI_RESPONSE_SCHEMA)
+            ),
+            generation_config={"response_mime_type": "application/json"},
+        )
+
+    ai_search._get_model()  # Aquece o modelo compartilhado
+
+    before = per_call_us(old_path, args.iterations)
+    after = per_call_us(ai_search._get_model, args.iterations)
+    print(f"Modelo por requisição : {before:10.2f} µs/chamada")
+    print(f"Modelo compartilhado  : {after:10.2f} µs/chamada")
+    print(f"Ganho                 : {before / after:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
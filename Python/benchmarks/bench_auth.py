@@ -0,0 +1,114 @@
+"""
+Micro-benchmark do custo de autenticação por requisição.
+
+Compara a dependência anterior (python-jose a cada requisição, HTTPException
+montada antes do decode, dependência síncrona rodando no threadpool) com a
+atual (async, verificação cacheada por hash do token):
+- por chamada: só a verificação do token;
+- por requisição: GET numa rota mínima protegida, via ASGI em processo,
+  menos o custo da mesma rota sem autenticação.
+
+Uso (a partir da pasta Python/):
+    python -m benchmarks.bench_auth --iterations 20000
+"""
+import time
+import asyncio
+import argparse
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException, Request, status
+from jose import JWTError, jwt
+
+from app import schemas, security
+from app.dependencies import get_current_org_id, oauth2_scheme
+
+
+# --- Dependências anteriores, para comparação ---
+
+def legacy_get_current_user_data(token: str = Depends(oauth2_scheme)) -> schemas.TokenData:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Não foi possível validar as credenciais",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(token, security.SECRET_KEY, algorithms=[security.ALGORITHM])
+        user_id = payload.get("user_id")
+        organization_id = payload.get("org_id")
+        if user_id is None or organization_id is None:
+            raise credentials_exception
+        return schemas.TokenData(user_id=user_id, organization_id=organization_id)
+    except JWTError:
+        raise credentials_exception
+
+
+async def legacy_set_request_context(request: Request, token_data=Depends(legacy_get_current_user_data)):
+    request.state.user_id = token_data.user_id
+    request.state.organization_id = token_data.organization_id
+
+
+async def legacy_get_current_org_id(request: Request, _=Depends(legacy_set_request_context)) -> int:
+    return request.state.organization_id
+
+
+app = FastAPI()
+
+
+@app.get("/none")
+async def no_auth():
+    return {}
+
+
+@app.get("/legacy")
+async def legacy_auth(org_id: int = Depends(legacy_get_current_org_id)):
+    return {}
+
+
+@app.get("/current")
+async def current_auth(org_id: int = Depends(get_current_org_id)):
+    return {}
+
+
+# --- Medições ---
+
+def per_call(label: str, func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    micros = (time.perf_counter() - started) / iterations * 1e6
+    print(f"{label:<40} {micros:9.1f} µs/chamada")
+    return micros
+
+
+async def per_request(path: str, headers: dict, iterations: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(200):  # Aquecimento
+            await client.get(path, headers=headers)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            response = await client.get(path, headers=headers)
+            assert response.status_code == 200, response.text
+        return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = security.create_access_token({"user_id": 1, "org_id": 1, "sub": "bench@ong.org"})
+    headers = {"Authorization": f"Bearer {token}"}
+    per_call("jwt.decode (sem cache)", lambda: jwt.decode(token, security.SECRET_KEY, algorithms=[security.ALGORITHM]), args.iterations)
+    security.decode_access_token(token)
+    per_call("security.decode_access_token (cache)", lambda: security.decode_access_token(token), args.iterations)
+
+    requests = max(1, args.iterations // 4)
+    baseline = asyncio.run(per_request("/none", {}, requests))
+    for label, path in (("anterior", "/legacy"), ("atual", "/current")):
+        total = asyncio.run(per_request(path, headers, requests))
+        print(f"requisição com auth {label:<20} {total:9.1f} µs (+{total - baseline:.1f} µs de auth)")
+
+
+if __name__ == "__main__":
+    main()
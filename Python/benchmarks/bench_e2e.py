@@ -0,0 +1,421 @@
+"""
+Benchmark ponta a ponta: vazão e latência do app.main:app sob um mix de tráfego.
+
+Sobe o app completo (middlewares, logs, cache, réplica se configurada) num
+subprocesso uvicorn, contra o banco de DATABASE_URL (PostgreSQL ou SQLite),
+e dispara por --duration segundos, com --concurrency clientes, um mix de:
+    catálogo      GET /public/products (filtros, ordenação, busca, páginas)
+    categorias    GET /public/categories e /public/categories/counts
+    busca AI      POST /public/search-ai com um Gemini simulado
+                  (--ai-latency-ms, --ai-failure-rate)
+    área da ONG   login JWT, listagem e criar/editar/remover produto
+    checkout      POST /public/orders com 1 a 3 itens
+Os dados do teste ficam numa ONG própria, removida no fim. Rodar depois do
+seed sintético (seed.py --synthetic) mede o app com um catálogo grande.
+
+Mostra req/s e p50/p95/p99 por endpoint, grava o resultado em JSON
+(--output) e, com --baseline, compara com um resultado anterior e sai com
+código 1 se p50/p95 piorarem ou a vazão cair mais que --tolerance.
+
+Uso (a partir da pasta Python/):
+    python -m benchmarks.bench_e2e --duration 30 --concurrency 16 --output resultado.json
+    python -m benchmarks.bench_e2e --duration 30 --baseline resultado.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import httpx
+
+BENCH_ORG_NAME = "ONG Benchmark E2E"
+BENCH_EMAIL = "bench-e2e{n}@ong.org"
+BENCH_PASSWORD = "senha-benchmark"
+BENCH_CATEGORIES = ["Decoração", "Acessórios", "Alimentos", "Vestuário", "Papelaria"]
+
+# Cenário -> peso no mix (cada cenário faz uma ou mais requisições)
+TRAFFIC_MIX = {
+    "browse": 40,
+    "categories": 10,
+    "search_ai": 10,
+    "ong_list": 10,
+    "ong_crud": 5,
+    "checkout": 15,
+    "login": 2,
+}
+# Status esperados por endpoint; os demais contam como erro
+EXPECTED_STATUS = {
+    "POST /auth/login": {200, 429},
+    "POST /public/orders": {201, 409},
+}
+
+# --- App com o Gemini simulado (executado no subprocesso uvicorn) ---
+
+class _StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubGenerativeModel:
+    """
+    Substitui genai.GenerativeModel: responde após BENCH_AI_LATENCY_MS
+    (±50%) e falha com probabilidade BENCH_AI_FAILURE_RATE. Latência acima
+    do timeout da Busca AI vira timeout de verdade (asyncio.wait_for).
+    """
+
+    def __init__(self, **kwargs):
+        self.latency = float(os.getenv("BENCH_AI_LATENCY_MS", 300)) / 1000
+        self.failure_rate = float(os.getenv("BENCH_AI_FAILURE_RATE", 0.05))
+
+    def _answer(self, prompt: str) -> _StubResponse:
+        if random.random() < self.failure_rate:
+            raise RuntimeError("falha simulada do Gemini")
+        words = prompt.split("'")[1].split() if "'" in prompt else []
+        return _StubResponse(json.dumps({"keywords": " ".join(words[:2]), "price_max": 100}))
+
+    def generate_content(self, prompt, request_options=None):
+        time.sleep(self.latency * random.uniform(0.5, 1.5))
+        return self._answer(prompt)
+
+    async def generate_content_async(self, prompt, request_options=None):
+        await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+        return self._answer(prompt)
+
+
+def create_app():
+    """ Factory do uvicorn: o app real, com a Busca AI apontando para o stub. """
+    from types import SimpleNamespace
+    from app import ai_search
+    from app.main import app
+
+    ai_search.genai = SimpleNamespace(GenerativeModel=StubGenerativeModel)
+    ai_search.reset_model()
+    return app
+
+# --- Dados do teste ---
+
+def setup(products: int, users: int) -> List[int]:
+    from app import models, security
+    from app.database import SessionLocal
+
+    rng = random.Random(0)
+    hashed_password = security.get_password_hash(BENCH_PASSWORD)
+    with SessionLocal() as db:
+        org = models.Organization(name=BENCH_ORG_NAME)
+        db.add(org)
+        db.flush()
+        db.add_all([
+            models.User(email=BENCH_EMAIL.format(n=n), hashed_password=hashed_password, organization_id=org.id)
+            for n in range(users)
+        ])
+        db.add_all([
+            models.Product(name=f"Produto benchmark {i}", description="Feito à mão por voluntários.",
+                           price=Decimal(rng.randint(500, 20000)).scaleb(-2),
+                           category=BENCH_CATEGORIES[i % len(BENCH_CATEGORIES)],
+                           stock_qty=1_000_000, weight_grams=250, organization_id=org.id)
+            for i in range(products)
+        ])
+        db.commit()
+        return [product_id for (product_id,) in
+                db.query(models.Product.id).filter(models.Product.organization_id == org.id)]
+
+
+def cleanup():
+    from app import models
+    from app.database import SessionLocal
+
+    with SessionLocal() as db:
+        org = db.query(models.Organization).filter(models.Organization.name == BENCH_ORG_NAME).first()
+        if org is None:
+            return
+        order_ids = db.query(models.OrderItem.order_id).filter(models.OrderItem.organization_id == org.id)
+        order_ids = [order_id for (order_id,) in order_ids.distinct()]
+        db.query(models.ProductSalesDaily).filter(models.ProductSalesDaily.organization_id == org.id).delete(synchronize_session=False)
+        db.query(models.OrderItem).filter(models.OrderItem.organization_id == org.id).delete(synchronize_session=False)
+        for start in range(0, len(order_ids), 1000):
+            db.query(models.Order).filter(models.Order.id.in_(order_ids[start:start + 1000])).delete(synchronize_session=False)
+        db.query(models.Product).filter(models.Product.organization_id == org.id).delete(synchronize_session=False)
+        db.query(models.User).filter(models.User.organization_id == org.id).delete(synchronize_session=False)
+        db.delete(org)
+        db.commit()
+
+# --- Carga ---
+
+class Recorder:
+    """ Latências e status por endpoint ("MÉTODO /rota"), ignorando o aquecimento. """
+
+    def __init__(self, warmup_until: float):
+        self.warmup_until = warmup_until
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[int, int]] = {}
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        if started >= self.warmup_until:
+            self.latencies.setdefault(endpoint, []).append(time.perf_counter() - started)
+            counts = self.statuses.setdefault(endpoint, {})
+            counts[response.status_code] = counts.get(response.status_code, 0) + 1
+        return response
+
+
+class Scenarios:
+    def __init__(self, recorder: Recorder, rng: random.Random, product_ids: List[int], tokens: List[str],
+                 users: int, ai_queries: int):
+        self.recorder = recorder
+        self.rng = rng
+        self.product_ids = product_ids
+        self.tokens = tokens
+        self.users = users
+        self.ai_queries = ai_queries
+
+    def _auth(self) -> dict:
+        return {"Authorization": f"Bearer {self.rng.choice(self.tokens)}"}
+
+    async def browse(self, client):
+        rng = self.rng
+        params = {"limit": rng.choice([20, 20, 50])}
+        kind = rng.random()
+        if kind < 0.4:
+            params["category"] = rng.choice(BENCH_CATEGORIES)
+        elif kind < 0.6:
+            params["search"] = rng.choice(["artesanal", "benchmark", "voluntários", "cerâmica"])
+        if rng.random() < 0.3:
+            params["price_min"], params["price_max"] = 10, rng.choice([50, 100, 150])
+        if rng.random() < 0.3:
+            params["sort"] = rng.choice(["price", "-price"])
+        response = await self.recorder.request(client, "GET /public/products", "GET", "/public/products", params=params)
+        cursor = response.headers.get("x-next-cursor")
+        if cursor and rng.random() < 0.5:
+            await self.recorder.request(client, "GET /public/products (cursor)", "GET", "/public/products",
+                                        params={**params, "cursor": cursor})
+
+    async def categories(self, client):
+        path = self.rng.choice(["/public/categories", "/public/categories/counts"])
+        await self.recorder.request(client, f"GET {path}", "GET", path)
+
+    async def search_ai(self, client):
+        # Consultas de várias palavras vão ao LLM; as repetidas saem do cache
+        query = f"presente sustentável número {self.rng.randrange(self.ai_queries)} para minha mãe"
+        await self.recorder.request(client, "POST /public/search-ai", "POST", "/public/search-ai", json={"query": query})
+
+    async def ong_list(self, client):
+        await self.recorder.request(client, "GET /products/", "GET", "/products/", headers=self._auth(),
+                                    params={"limit": 20})
+
+    async def ong_crud(self, client):
+        headers = self._auth()
+        body = {"name": "Produto temporário", "description": "Criado pelo benchmark", "price": "19.90",
+                "category": self.rng.choice(BENCH_CATEGORIES), "stock_qty": 10, "weight_grams": 100}
+        response = await self.recorder.request(client, "POST /products/", "POST", "/products/", headers=headers, json=body)
+        if response.status_code != 201:
+            return
+        product_id = response.json()["id"]
+        await self.recorder.request(client, "PUT /products/{product_id}", "PUT", f"/products/{product_id}",
+                                    headers=headers, json={**body, "price": "24.90"})
+        await self.recorder.request(client, "DELETE /products/{product_id}", "DELETE", f"/products/{product_id}",
+                                    headers=headers)
+
+    async def checkout(self, client):
+        chosen = self.rng.sample(self.product_ids, self.rng.randint(1, 3))
+        items = [{"product_id": product_id, "quantity": self.rng.randint(1, 2)} for product_id in chosen]
+        await self.recorder.request(client, "POST /public/orders", "POST", "/public/orders", json={"items": items})
+
+    async def login(self, client):
+        form = {"username": BENCH_EMAIL.format(n=self.rng.randrange(self.users)), "password": BENCH_PASSWORD}
+        await self.recorder.request(client, "POST /auth/login", "POST", "/auth/login", data=form)
+
+
+async def login_tokens(base_url: str, users: int) -> List[str]:
+    tokens = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        for n in range(users):
+            response = await client.post("/auth/login", data={"username": BENCH_EMAIL.format(n=n), "password": BENCH_PASSWORD})
+            response.raise_for_status()
+            tokens.append(response.json()["access_token"])
+    return tokens
+
+
+async def run_load(base_url: str, args, product_ids: List[int], tokens: List[str]) -> Recorder:
+    started = time.perf_counter()
+    recorder = Recorder(warmup_until=started + args.warmup)
+    deadline = started + args.warmup + args.duration
+    names, weights = list(TRAFFIC_MIX), list(TRAFFIC_MIX.values())
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        async def worker(n: int):
+            rng = random.Random(args.seed * 1000 + n)
+            scenarios = Scenarios(recorder, rng, product_ids, tokens, args.users, args.ai_queries)
+            while time.perf_counter() < deadline:
+                await getattr(scenarios, rng.choices(names, weights)[0])(client)
+
+        await asyncio.gather(*(worker(n) for n in range(args.concurrency)))
+    return recorder
+
+# --- Relatório ---
+
+def percentile(samples: List[float], q: float) -> float:
+    """ Percentil por posição (nearest-rank) de uma lista ordenada. """
+    return samples[min(len(samples) - 1, max(0, int(round(q * len(samples))) - 1))]
+
+
+def summarize(recorder: Recorder, duration: float) -> Dict[str, dict]:
+    endpoints = {}
+    for endpoint, latencies in sorted(recorder.latencies.items()):
+        latencies = sorted(latencies)
+        statuses = recorder.statuses[endpoint]
+        expected = EXPECTED_STATUS.get(endpoint, set(range(200, 400)))
+        endpoints[endpoint] = {
+            "requests": len(latencies),
+            "rps": round(len(latencies) / duration, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "errors": sum(count for code, count in statuses.items() if code not in expected),
+            "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        }
+    return endpoints
+
+
+def print_report(result: dict) -> None:
+    print(f"\n{'endpoint':<36} {'req':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'erros':>6}")
+    for endpoint, stats in result["endpoints"].items():
+        print(f"{endpoint:<36} {stats['requests']:>7} {stats['rps']:>8.1f} {stats['p50_ms']:>9.1f} "
+              f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['errors']:>6}")
+    total = result["total"]
+    print(f"{'total':<36} {total['requests']:>7} {total['rps']:>8.1f} {'':>9} {'':>9} {'':>9} {total['errors']:>6}")
+
+
+def compare(result: dict, baseline: dict, tolerance: float, min_samples: int) -> List[str]:
+    """
+    Endpoints que pioraram mais que 'tolerance' (fração) em p50, p95 ou req/s.
+    Endpoints com menos de 'min_samples' requisições em alguma das medições
+    só aparecem na tabela: o p95 de poucas amostras é ruído.
+    """
+    regressions = []
+    print(f"\nComparação com o baseline ({baseline.get('timestamp', '?')}, tolerância {tolerance:.0%}):")
+    for endpoint, stats in result["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(endpoint)
+        if not base:
+            continue
+        comparable = min(stats["requests"], base["requests"]) >= min_samples
+        changes = []
+        for key in ("p50_ms", "p95_ms"):
+            if base[key] > 0:
+                delta = stats[key] / base[key] - 1
+                changes.append(f"{key} {delta:+.0%}")
+                if comparable and delta > tolerance:
+                    regressions.append(f"{endpoint}: {key} {base[key]} -> {stats[key]}")
+        if base["rps"] > 0:
+            delta = stats["rps"] / base["rps"] - 1
+            changes.append(f"req/s {delta:+.0%}")
+            if comparable and delta < -tolerance:
+                regressions.append(f"{endpoint}: req/s {base['rps']} -> {stats['rps']}")
+        print(f"  {endpoint:<36} " + " | ".join(changes) + ("" if comparable else " (poucas amostras)"))
+    for regression in regressions:
+        print(f"  REGRESSÃO {regression}")
+    return regressions
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def wait_ready(base_url: str, process: subprocess.Popen):
+    for _ in range(300):
+        if process.poll() is not None:
+            sys.exit("O servidor de benchmark não subiu.")
+        try:
+            httpx.get(f"{base_url}/", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    sys.exit("Timeout esperando o servidor de benchmark.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=30, help="Segundos medidos")
+    parser.add_argument("--warmup", type=float, default=5, help="Segundos iniciais descartados")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1, help="Workers do uvicorn")
+    parser.add_argument("--products", type=int, default=2000, help="Produtos da ONG de teste")
+    parser.add_argument("--users", type=int, default=4, help="Usuários da ONG de teste")
+    parser.add_argument("--ai-latency-ms", type=float, default=300, help="Latência média do Gemini simulado")
+    parser.add_argument("--ai-failure-rate", type=float, default=0.05, help="Fração de chamadas ao Gemini que falham")
+    parser.add_argument("--ai-queries", type=int, default=500, help="Consultas distintas da busca AI")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8097)
+    parser.add_argument("--output", help="Arquivo JSON para o resultado")
+    parser.add_argument("--baseline", help="Resultado JSON anterior para comparação")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Piora aceita antes de acusar regressão")
+    parser.add_argument("--min-samples", type=int, default=100, help="Requisições mínimas para comparar um endpoint")
+    args = parser.parse_args()
+
+    from app.database import Base, engine
+    from app.models import Organization  # noqa: F401  (registra os modelos no metadata)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    Base.metadata.create_all(bind=engine)
+    cleanup()
+    product_ids = setup(args.products, args.users)
+    env = {**os.environ, "BENCH_AI_LATENCY_MS": str(args.ai_latency_ms),
+           "BENCH_AI_FAILURE_RATE": str(args.ai_failure_rate)}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.bench_e2e:create_app", "--factory",
+         "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL,  # Logs JSON do app: gerados, mas descartados
+    )
+    try:
+        wait_ready(base_url, server)
+        tokens = asyncio.run(login_tokens(base_url, args.users))
+        print(f"{engine.dialect.name}, {args.workers} worker(s), concorrência {args.concurrency}, "
+              f"{args.duration:.0f}s (+{args.warmup:.0f}s de aquecimento), Gemini simulado "
+              f"{args.ai_latency_ms:.0f}ms / {args.ai_failure_rate:.0%} de falhas")
+        recorder = asyncio.run(run_load(base_url, args, product_ids, tokens))
+    finally:
+        server.terminate()
+        server.wait()
+        cleanup()
+
+    endpoints = summarize(recorder, args.duration)
+    result = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "database": engine.dialect.name,
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "total": {
+            "requests": sum(stats["requests"] for stats in endpoints.values()),
+            "rps": round(sum(stats["rps"] for stats in endpoints.values()), 2),
+            "errors": sum(stats["errors"] for stats in endpoints.values()),
+        },
+        "endpoints": endpoints,
+    }
+    print_report(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\nResultado salvo em {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(result, baseline, args.tolerance, args.min_samples):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
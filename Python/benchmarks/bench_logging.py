@@ -0,0 +1,149 @@
+"""
+Micro-benchmark do custo do middleware de log por requisição.
+
+Compara, numa rota mínima chamada via ASGI em processo:
+- sem middleware de log (linha de base);
+- middleware anterior: @app.middleware("http"), time.time(), json.dumps e
+  StreamHandler síncrono;
+- middleware atual (app.main): ASGI puro, fila + thread de fundo, orjson se
+  instalado;
+- middleware atual com amostragem de sucessos (--sample-rate).
+O destino dos logs é um stream que dorme --sink-latency-ms a cada escrita,
+simulando um stdout com backpressure (pipe cheio, coletor atrasado).
+
+Uso (a partir da pasta Python/):
+    python -m benchmarks.bench_logging --requests 5000 --sink-latency-ms 0.2
+"""
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+
+import httpx
+from fastapi import FastAPI, Request
+
+from app import main, structured_logging
+
+
+class SlowSink:
+    """ Stream de texto que simula um stdout lento. """
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+        self.lines = 0
+
+    def write(self, data: str) -> int:
+        if self.latency:
+            time.sleep(self.latency)
+        self.lines += data.count("\n")
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+# --- Middleware anterior, para comparação ---
+
+class LegacyJsonLogFormatter(logging.Formatter):
+    def format(self, record):
+        log_record = {
+            "timestamp": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "module": record.module,
+            "funcName": record.funcName,
+        }
+        if hasattr(record, "extra_data"):
+            log_record.update(record.extra_data)
+        return json.dumps(log_record)
+
+
+legacy_logger = logging.getLogger("bench_legacy_log")
+legacy_logger.propagate = False
+
+
+async def legacy_log_middleware(request: Request, call_next):
+    start_time = time.time()
+    response = await call_next(request)
+    latency = time.time() - start_time
+    log_data = {
+        "extra_data": {
+            "http_method": request.method,
+            "http_path": request.url.path,
+            "http_status_code": response.status_code,
+            "http_latency_ms": round(latency * 1000, 2),
+            "user_id": getattr(request.state, "user_id", "anonymous"),
+            "organization_id": getattr(request.state, "organization_id", "none"),
+        }
+    }
+    legacy_logger.info(f"HTTP Request: {request.method} {request.url.path}", extra=log_data)
+    return response
+
+
+def build_app(legacy: bool = False, current: bool = False) -> FastAPI:
+    bench_app = FastAPI()
+    if legacy:
+        bench_app.middleware("http")(legacy_log_middleware)
+    if current:
+        bench_app.add_middleware(main.StructuredLogMiddleware)
+
+    @bench_app.get("/ping")
+    async def ping():
+        return {}
+
+    return bench_app
+
+
+async def per_request(bench_app: FastAPI, requests: int) -> float:
+    transport = httpx.ASGITransport(app=bench_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(200):  # Aquecimento
+            await client.get("/ping")
+        started = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/ping")
+        return (time.perf_counter() - started) / requests * 1e6
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--sink-latency-ms", type=float, default=0.2)
+    parser.add_argument("--sample-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    sink = SlowSink(args.sink_latency_ms)
+    legacy_handler = logging.StreamHandler(sink)
+    legacy_handler.setFormatter(LegacyJsonLogFormatter())
+    legacy_logger.addHandler(legacy_handler)
+    legacy_logger.setLevel(logging.INFO)
+    # Os logs do app passam a ir para o mesmo destino lento
+    main.log_listener.handlers[0].setStream(sink)
+
+    encoder = "orjson" if structured_logging.orjson is not None else "json"
+    print(f"{args.requests} requisições, escrita de log com {args.sink_latency_ms}ms de latência, encoder {encoder}")
+    baseline = asyncio.run(per_request(build_app(), args.requests))
+    print(f"{'sem log':<32} {baseline:8.1f} µs/req")
+
+    full_rate = structured_logging.LOG_SUCCESS_SAMPLE_RATE
+    cases = (
+        ("anterior (síncrono)", {"legacy": True}, full_rate),
+        ("atual (fila)", {"current": True}, 1.0),
+        (f"atual, amostragem {args.sample_rate:g}", {"current": True}, args.sample_rate),
+    )
+    for label, options, rate in cases:
+        structured_logging.LOG_SUCCESS_SAMPLE_RATE = rate
+        dropped = structured_logging.dropped_records()
+        total = asyncio.run(per_request(build_app(**options), args.requests))
+        print(f"{label:<32} {total:8.1f} µs/req (+{total - baseline:.1f} µs de log, "
+              f"{structured_logging.dropped_records() - dropped} descartados)")
+    structured_logging.LOG_SUCCESS_SAMPLE_RATE = full_rate
+
+    structured_logging.stop_logging(main.log_listener)
+    print(f"linhas escritas: {sink.lines}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,164 @@
+"""
+Benchmark: rajada de logins x latência das outras rotas do mesmo worker.
+
+Sobe, num subprocesso uvicorn de 1 worker, um app com:
+    /legacy/login -> login anterior (async def chamando o bcrypt direto no event loop)
+    /auth/login   -> login atual (bcrypt no pool limitado de security, 429 com fila cheia)
+    /ping         -> rota trivial, usada como sonda de latência
+Para cada versão, dispara --logins logins com --concurrency clientes (metade
+com email inexistente, metade com senha errada, como num credential
+stuffing) enquanto uma sonda chama /ping em sequência, e mostra p50/p99 da
+sonda e dos logins. Sem rajada, a sonda fica em ~1ms.
+Mantenha --concurrency abaixo do pool do banco (5 + 10 no SQLite): acima
+disso a versão anterior trava o worker (o checkout da Session síncrona
+bloqueia o event loop esperando uma conexão que só é devolvida por ele).
+
+Uso (a partir da pasta Python/):
+    python -m benchmarks.bench_login_storm --logins 100 --concurrency 12
+"""
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import subprocess
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.orm import Session
+
+from app import crud, models, security
+from app.database import Base, SessionLocal, engine, get_db
+from app.routers import auth
+
+BENCH_ORG_NAME = "ONG Benchmark Login"
+BENCH_EMAIL = "bench-login@ong.org"
+BENCH_PASSWORD = "senha-benchmark"
+
+# --- App de comparação (importado pelo subprocesso uvicorn) ---
+
+storm_app = FastAPI()
+storm_app.include_router(auth.router, prefix="/auth")
+
+
+@storm_app.post("/legacy/login")
+async def legacy_login(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
+    # Versão anterior: consulta e bcrypt síncronos dentro de uma rota async
+    user = crud.get_user_by_email(db, form_data.username)
+    if not user or not security.verify_password(form_data.password, user.hashed_password):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email ou senha incorretos")
+    return {"access_token": "-", "token_type": "bearer"}
+
+
+@storm_app.get("/ping")
+async def ping():
+    return {}
+
+
+# --- Carga ---
+
+def setup():
+    with SessionLocal() as db:
+        org = models.Organization(name=BENCH_ORG_NAME)
+        db.add(org)
+        db.flush()
+        db.add(models.User(email=BENCH_EMAIL, hashed_password=security.get_password_hash(BENCH_PASSWORD),
+                           organization_id=org.id))
+        db.commit()
+
+
+def cleanup():
+    with SessionLocal() as db:
+        org = db.query(models.Organization).filter(models.Organization.name == BENCH_ORG_NAME).first()
+        if org is None:
+            return
+        db.query(models.User).filter(models.User.organization_id == org.id).delete(synchronize_session=False)
+        db.delete(org)
+        db.commit()
+
+
+def percentiles(samples: list) -> str:
+    if not samples:
+        return "sem amostras"
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f"p50 {statistics.median(samples) * 1000:7.1f}ms | p99 {p99 * 1000:7.1f}ms"
+
+
+async def storm(base_url: str, path: str, logins: int, concurrency: int) -> dict:
+    login_latencies, probe_latencies, statuses = [], [], {}
+    queue = asyncio.Queue()
+    for i in range(logins):
+        email = BENCH_EMAIL if i % 2 else f"naoexiste{i}@ong.org"
+        queue.put_nowait({"username": email, "password": "senha-errada"})
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        async def attacker():
+            while not queue.empty():
+                form = queue.get_nowait()
+                started = time.perf_counter()
+                response = await client.post(path, data=form)
+                login_latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        async def probe():
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/ping")
+                probe_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        prober = asyncio.create_task(probe())
+        await asyncio.gather(*(attacker() for _ in range(concurrency)))
+        done.set()
+        await prober
+
+    return {"logins": login_latencies, "probe": probe_latencies, "statuses": statuses}
+
+
+def wait_ready(base_url: str, process: subprocess.Popen):
+    for _ in range(100):
+        if process.poll() is not None:
+            sys.exit("O servidor de benchmark não subiu.")
+        try:
+            httpx.get(f"{base_url}/ping", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    sys.exit("Timeout esperando o servidor de benchmark.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=12)
+    parser.add_argument("--port", type=int, default=8098)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    Base.metadata.create_all(bind=engine)
+    cleanup()
+    setup()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.bench_login_storm:storm_app",
+         "--port", str(args.port), "--log-level", "warning"],
+    )
+    try:
+        wait_ready(base_url, server)
+        print(f"{args.logins} logins inválidos, concorrência {args.concurrency} "
+              f"(LOGIN_MAX_CONCURRENCY={security.LOGIN_MAX_CONCURRENCY}, LOGIN_MAX_PENDING={security.LOGIN_MAX_PENDING})")
+        for label, path in (("anterior", "/legacy/login"), ("atual", "/auth/login")):
+            result = asyncio.run(storm(base_url, path, args.logins, args.concurrency))
+            statuses = ", ".join(f"{code}: {count}" for code, count in sorted(result["statuses"].items()))
+            print(f"{label:<9} sonda /ping {percentiles(result['probe'])} | "
+                  f"login {percentiles(result['logins'])} | {statuses}")
+    finally:
+        server.terminate()
+        server.wait()
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: carga de catálogo por uma ONG.
+
+Compara, para o mesmo conjunto de produtos:
+- anterior: um POST /products/ por produto (commit e refresh a cada um),
+  medido em --single-rows produtos e projetado em linhas/s;
+- atual: POST /products/import com o arquivo inteiro, em CSV e em NDJSON,
+  primeiro criando (SKUs novos) e depois atualizando (mesmos SKUs).
+O app roda em processo (ASGI, sem rede); o corpo é enviado em pedaços de
+64 KB, como num upload.
+
+Uso (a partir da pasta Python/):
+    python -m benchmarks.bench_product_import --rows 20000
+"""
+import json
+import time
+import asyncio
+import argparse
+
+import httpx
+
+from app import models, security
+from app.database import Base, SessionLocal, engine
+from app.main import app
+
+BENCH_ORG_NAME = "ONG Benchmark Importação"
+UPLOAD_PIECE = 64 * 1024
+
+
+def setup() -> dict:
+    with SessionLocal() as db:
+        org = models.Organization(name=BENCH_ORG_NAME)
+        db.add(org)
+        db.commit()
+        token = security.create_access_token({"user_id": 0, "org_id": org.id, "sub": "bench"})
+        return {"Authorization": f"Bearer {token}"}
+
+
+def cleanup():
+    with SessionLocal() as db:
+        org = db.query(models.Organization).filter(models.Organization.name == BENCH_ORG_NAME).first()
+        if org is None:
+            return
+        db.query(models.Product).filter(models.Product.organization_id == org.id).delete(synchronize_session=False)
+        db.delete(org)
+        db.commit()
+
+
+def product(i: int, prefix: str) -> dict:
+    return {"sku": f"{prefix}-{i:07d}", "name": f"Produto importado {i}", "description": "Feito à mão por voluntários.",
+            "price": f"{i % 200 + 1}.90", "category": ("Decoração", "Acessórios", "Alimentos")[i % 3],
+            "image_url": f"https://img.exemplo.org/{i}.jpg", "stock_qty": i % 50, "weight_grams": 250}
+
+
+def csv_body(rows: int, prefix: str) -> bytes:
+    header = "sku,name,description,price,category,image_url,stock_qty,weight_grams\n"
+    lines = (",".join(str(value) for value in product(i, prefix).values()) + "\n" for i in range(rows))
+    return (header + "".join(lines)).encode()
+
+
+def ndjson_body(rows: int, prefix: str) -> bytes:
+    return "".join(json.dumps(product(i, prefix), ensure_ascii=False) + "\n" for i in range(rows)).encode()
+
+
+async def upload(body: bytes):
+    for start in range(0, len(body), UPLOAD_PIECE):
+        yield body[start:start + UPLOAD_PIECE]
+
+
+async def run(args, headers: dict):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        started = time.perf_counter()
+        for i in range(args.single_rows):
+            body = product(i, "single")
+            del body["sku"]
+            response = await client.post("/products/", json=body, headers=headers)
+            assert response.status_code == 201, response.text
+        single = args.single_rows / (time.perf_counter() - started)
+        print(f"{'anterior: POST /products/ por produto':<44} {single:10,.0f} linhas/s")
+
+        for label, content_type, build in (("CSV", "text/csv", csv_body), ("NDJSON", "application/x-ndjson", ndjson_body)):
+            body = build(args.rows, label)
+            for action in ("cria", "atualiza"):
+                started = time.perf_counter()
+                response = await client.post("/products/import", content=upload(body),
+                                             headers={**headers, "Content-Type": content_type})
+                elapsed = time.perf_counter() - started
+                result = response.json()
+                assert response.status_code == 200 and result["failed"] == 0, response.text
+                print(f"{f'atual: /products/import {label} ({action})':<44} {args.rows / elapsed:10,.0f} linhas/s"
+                      f"   ({result['created']} criados, {result['updated']} atualizados, {len(body) / 1e6:.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--single-rows", type=int, default=300, help="Produtos enviados um a um (referência)")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    cleanup()
+    headers = setup()
+    try:
+        print(f"{args.rows} produtos ({engine.dialect.name})")
+        asyncio.run(run(args, headers))
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
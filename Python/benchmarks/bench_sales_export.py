@@ -0,0 +1,125 @@
+"""
+Benchmark: exportação das vendas de uma ONG (memória e vazão).
+
+Compara, para o mesmo histórico (--orders pedidos com --items itens cada):
+- ingênuo: a consulta de crud.sales_export_stmt com .all() e o CSV montado
+  inteiro em memória antes de responder;
+- atual: sales_export.stream_sales (cursor no servidor, um pedaço do corpo
+  por lote de SALES_EXPORT_BATCH_SIZE linhas), com os pedaços descartados
+  como faria o envio pela rede.
+Mostra o pico de memória alocada (tracemalloc) e as linhas/s de cada um.
+Rode com tamanhos diferentes: o pico do atual não deve crescer.
+
+Uso (a partir da pasta Python/):
+    python -m benchmarks.bench_sales_export --orders 50000 --items 2
+"""
+import io
+import csv
+import time
+import asyncio
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import insert
+
+from app import crud, models, sales_export
+from app.database import Base, SessionLocal, engine
+
+BENCH_ORG_NAME = "ONG Benchmark Exportação"
+
+
+def setup(orders: int, items: int) -> int:
+    with SessionLocal() as db:
+        org = models.Organization(name=BENCH_ORG_NAME)
+        db.add(org)
+        db.flush()
+        product_ids = db.scalars(insert(models.Product).returning(models.Product.id), [
+            {"name": f"Produto vendido {i}", "price": Decimal("19.90"), "category": "Benchmark",
+             "stock_qty": 0, "weight_grams": 100, "organization_id": org.id}
+            for i in range(50)
+        ]).all()
+        start = datetime.now(timezone.utc) - timedelta(days=365)
+        for first in range(0, orders, 10000):
+            count = min(10000, orders - first)
+            order_ids = db.scalars(insert(models.Order).returning(models.Order.id), [
+                {"created_at": start + timedelta(minutes=first + i)} for i in range(count)
+            ]).all()
+            db.execute(insert(models.OrderItem), [
+                {"order_id": order_id, "product_id": product_ids[(n + k) % len(product_ids)], "quantity": k + 1,
+                 "price_at_purchase": Decimal("19.90"), "organization_id": org.id}
+                for n, order_id in enumerate(order_ids) for k in range(items)
+            ])
+        db.commit()
+        return org.id
+
+
+def cleanup():
+    with SessionLocal() as db:
+        org = db.query(models.Organization).filter(models.Organization.name == BENCH_ORG_NAME).first()
+        if org is None:
+            return
+        order_ids = [order_id for (order_id,) in db.query(models.OrderItem.order_id)
+                     .filter(models.OrderItem.organization_id == org.id).distinct()]
+        db.query(models.OrderItem).filter(models.OrderItem.organization_id == org.id).delete(synchronize_session=False)
+        for first in range(0, len(order_ids), 1000):
+            db.query(models.Order).filter(models.Order.id.in_(order_ids[first:first + 1000])).delete(synchronize_session=False)
+        db.query(models.Product).filter(models.Product.organization_id == org.id).delete(synchronize_session=False)
+        db.delete(org)
+        db.commit()
+
+
+def naive_export(org_id: int) -> int:
+    with SessionLocal() as db:
+        rows = db.execute(crud.sales_export_stmt(org_id)).all()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(sales_export.SALES_EXPORT_FIELDS)
+        writer.writerows(sales_export._export_row(row) for row in rows)
+        return len(buffer.getvalue().encode())
+
+
+async def streamed_export(org_id: int) -> int:
+    size = 0
+    async for piece in sales_export.stream_sales(org_id, None, None, "csv"):
+        size += len(piece)
+    return size
+
+
+def measure(label: str, func, rows: int):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<36} pico {peak / 1e6:8.1f} MB | {rows / elapsed:10,.0f} linhas/s | {size / 1e6:.1f} MB de CSV")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=50000)
+    parser.add_argument("--items", type=int, default=2)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    cleanup()
+    org_id = setup(args.orders, args.items)
+    rows = args.orders * args.items
+    try:
+        print(f"{rows} itens vendidos ({engine.dialect.name}, lotes de {sales_export.SALES_EXPORT_BATCH_SIZE})")
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(streamed_export(org_id))  # Aquece o pool e os imports
+            measure("ingênuo: .all() + CSV em memória", lambda: naive_export(org_id), rows)
+            measure("atual: stream_sales (cursor)", lambda: loop.run_until_complete(streamed_export(org_id)), rows)
+        finally:
+            loop.close()
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: painel de vendas da ONG (unidades e receita por produto por dia).
+
+Compara, para o mesmo histórico (--orders pedidos ao longo de um ano, com
+--items itens cada, entre --products produtos):
+- sob demanda: a agregação de order_items (JOIN orders, GROUP BY dia e
+  produto), que percorre os itens do período;
+- atual: crud.get_sales_summary_async, que lê o resumo product_sales_daily.
+Mostra a mediana de --repeat consultas para 30 e 365 dias, e o tempo de
+sales_rollup.rebuild (recriar o resumo da ONG a partir dos itens).
+Rode com tamanhos diferentes: o tempo do atual não deve crescer com --orders.
+
+Uso (a partir da pasta Python/):
+    python -m benchmarks.bench_sales_summary --orders 200000 --items 2
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import insert
+
+from app import crud, models, sales_rollup
+from app.database import Base, SessionLocal, AsyncSessionLocal, engine
+
+BENCH_ORG_NAME = "ONG Benchmark Painel"
+
+
+def setup(orders: int, items: int, products: int) -> int:
+    with SessionLocal() as db:
+        org = models.Organization(name=BENCH_ORG_NAME)
+        db.add(org)
+        db.flush()
+        product_ids = db.scalars(insert(models.Product).returning(models.Product.id), [
+            {"name": f"Produto do painel {i}", "price": Decimal("19.90"), "category": "Benchmark",
+             "stock_qty": 0, "weight_grams": 100, "organization_id": org.id}
+            for i in range(products)
+        ]).all()
+        start = datetime.now(timezone.utc) - timedelta(days=365)
+        gap = 365 * 86400 / orders
+        for first in range(0, orders, 10000):
+            count = min(10000, orders - first)
+            order_ids = db.scalars(insert(models.Order).returning(models.Order.id), [
+                {"created_at": start + timedelta(seconds=(first + i) * gap)} for i in range(count)
+            ]).all()
+            db.execute(insert(models.OrderItem), [
+                {"order_id": order_id, "product_id": product_ids[((first + n) * items + k) % len(product_ids)],
+                 "quantity": k + 1, "price_at_purchase": Decimal("19.90"), "organization_id": org.id}
+                for n, order_id in enumerate(order_ids) for k in range(items)
+            ])
+        db.commit()
+        return org.id
+
+
+def cleanup():
+    with SessionLocal() as db:
+        org = db.query(models.Organization).filter(models.Organization.name == BENCH_ORG_NAME).first()
+        if org is None:
+            return
+        order_ids = [order_id for (order_id,) in db.query(models.OrderItem.order_id)
+                     .filter(models.OrderItem.organization_id == org.id).distinct()]
+        db.query(models.ProductSalesDaily).filter(models.ProductSalesDaily.organization_id == org.id).delete(synchronize_session=False)
+        db.query(models.OrderItem).filter(models.OrderItem.organization_id == org.id).delete(synchronize_session=False)
+        for first in range(0, len(order_ids), 1000):
+            db.query(models.Order).filter(models.Order.id.in_(order_ids[first:first + 1000])).delete(synchronize_session=False)
+        db.query(models.Product).filter(models.Product.organization_id == org.id).delete(synchronize_session=False)
+        db.delete(org)
+        db.commit()
+
+
+async def on_demand(org_id: int, start: date, end: date) -> int:
+    stmt = crud.sales_rollup_source_stmt(engine.dialect.name, org_id).where(
+        models.Order.created_at >= datetime.combine(start, datetime.min.time(), timezone.utc),
+        models.Order.created_at < datetime.combine(end + timedelta(days=1), datetime.min.time(), timezone.utc),
+    )
+    async with AsyncSessionLocal() as db:
+        return len((await db.execute(stmt)).all())
+
+
+async def from_rollup(org_id: int, start: date, end: date) -> int:
+    async with AsyncSessionLocal() as db:
+        return len(await crud.get_sales_summary_async(db, organization_id=org_id, start=start, end=end))
+
+
+async def median_ms(query, org_id: int, days: int, repeat: int):
+    end = datetime.now(timezone.utc).date()
+    start = end - timedelta(days=days - 1)
+    rows = await query(org_id, start, end)  # Aquece o pool e o cache do banco
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await query(org_id, start, end)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), rows
+
+
+async def run(org_id: int, repeat: int):
+    for days in (30, 365):
+        for label, query in ((f"sob demanda: order_items ({days} dias)", on_demand),
+                             (f"atual: product_sales_daily ({days} dias)", from_rollup)):
+            elapsed, rows = await median_ms(query, org_id, days, repeat)
+            print(f"{label:<44} {elapsed:9.1f} ms  ({rows} linhas dia x produto)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200000)
+    parser.add_argument("--items", type=int, default=2)
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    cleanup()
+    org_id = setup(args.orders, args.items, args.products)
+    try:
+        started = time.perf_counter()
+        rollup_rows = sales_rollup.rebuild(org_id)
+        print(f"{args.orders * args.items} itens vendidos ({engine.dialect.name}); "
+              f"rebuild do resumo: {rollup_rows} linhas em {time.perf_counter() - started:.2f}s")
+        asyncio.run(run(org_id, args.repeat))
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark: serialização de uma página de produtos (padrão: 100 itens).
+
+Compara, para a mesma página de uma ONG:
+- anterior: entidades ORM (db.query(models.Product)) validadas uma a uma
+  por schemas.Product (from_attributes) e serializadas pelo response_model;
+- atual: só as colunas do schema (crud.get_product_rows_by_org) e
+  serialization.product_rows_json (orjson, se instalado).
+Mede por chamada (consulta + serialização, sem HTTP) e por requisição (rota
+mínima via ASGI em processo), e confere que os dois JSONs são iguais.
+
+Uso (a partir da pasta Python/):
+    python -m benchmarks.bench_serialization --page-size 100 --iterations 500
+"""
+import json
+import time
+import asyncio
+import argparse
+from decimal import Decimal
+from typing import List
+
+import httpx
+from fastapi import Depends, FastAPI, Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas, serialization
+from app.database import Base, SessionLocal, engine, get_db
+
+BENCH_ORG_NAME = "ONG Benchmark Serialização"
+
+_org_id = None
+_page_size = 100
+
+# --- App de comparação ---
+
+bench_app = FastAPI()
+
+
+@bench_app.get("/orm", response_model=List[schemas.Product])
+def orm_products(db: Session = Depends(get_db)):
+    return crud.get_products_by_org(db, organization_id=_org_id, limit=_page_size)
+
+
+@bench_app.get("/rows", response_model=List[schemas.Product])
+def row_products(db: Session = Depends(get_db)):
+    rows = crud.get_product_rows_by_org(db, organization_id=_org_id, limit=_page_size)
+    return Response(content=serialization.product_rows_json(rows), media_type="application/json")
+
+
+# --- Carga ---
+
+def setup(products: int) -> int:
+    with SessionLocal() as db:
+        org = models.Organization(name=BENCH_ORG_NAME)
+        db.add(org)
+        db.flush()
+        db.add_all([
+            models.Product(name=f"Produto artesanal {i}", description="Feito à mão por voluntários. " * 4,
+                           price=Decimal(i % 50) + Decimal("0.90"), category="Benchmark",
+                           image_url=f"https://img.exemplo.org/{i}.jpg", stock_qty=i, weight_grams=250,
+                           organization_id=org.id)
+            for i in range(products)
+        ])
+        db.commit()
+        return org.id
+
+
+def cleanup():
+    with SessionLocal() as db:
+        org = db.query(models.Organization).filter(models.Organization.name == BENCH_ORG_NAME).first()
+        if org is None:
+            return
+        db.query(models.Product).filter(models.Product.organization_id == org.id).delete(synchronize_session=False)
+        db.delete(org)
+        db.commit()
+
+
+def per_call(label: str, func, iterations: int) -> float:
+    func()  # Aquecimento
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    micros = (time.perf_counter() - started) / iterations * 1e6
+    print(f"{label:<44} {micros:9.1f} µs/chamada")
+    return micros
+
+
+async def per_request(path: str, iterations: int) -> float:
+    transport = httpx.ASGITransport(app=bench_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(20):  # Aquecimento
+            await client.get(path)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            response = await client.get(path)
+            assert response.status_code == 200, response.text
+        return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    global _org_id, _page_size
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    cleanup()
+    _org_id, _page_size = setup(args.page_size), args.page_size
+    adapter = TypeAdapter(List[schemas.Product])
+    try:
+        with SessionLocal() as db:
+            def orm_path() -> bytes:
+                products = crud.get_products_by_org(db, organization_id=_org_id, limit=_page_size)
+                return adapter.dump_json(adapter.validate_python(products, from_attributes=True))
+
+            def rows_path() -> bytes:
+                rows = crud.get_product_rows_by_org(db, organization_id=_org_id, limit=_page_size)
+                return serialization.product_rows_json(rows)
+
+            assert json.loads(orm_path()) == json.loads(rows_path()), "As duas saídas deveriam ser iguais"
+            encoder = "orjson" if serialization.orjson is not None else "json"
+            print(f"Página de {args.page_size} produtos ({engine.dialect.name}, encoder {encoder})")
+            before = per_call("anterior: ORM + schemas.Product", orm_path, args.iterations)
+            after = per_call("atual: colunas + product_rows_json", rows_path, args.iterations)
+            print(f"{'':<44} {before / after:9.1f}x")
+
+        for label, path in (("requisição anterior (/orm)", "/orm"), ("requisição atual (/rows)", "/rows")):
+            micros = asyncio.run(per_request(path, max(1, args.iterations // 2)))
+            print(f"{label:<44} {micros:9.1f} µs/req")
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
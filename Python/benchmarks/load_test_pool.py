@@ -0,0 +1,78 @@
+"""
+Teste de carga do pool de conexões: mostra o comportamento na saturação.
+
+Dispara --clients threads (como o threadpool do FastAPI) que pegam uma
+conexão do pool, seguram por --hold-ms (simulando uma consulta) e devolvem.
+Com mais clientes do que pool_size + max_overflow, as threads passam a
+esperar no checkout; se a espera passar de DB_POOL_TIMEOUT, há timeout
+(na API, vira 503). Ao final imprime as métricas de app.pool_metrics.
+
+Uso (a partir da pasta Python/, com DATABASE_URL apontando para o PostgreSQL):
+    python -m benchmarks.load_test_pool --clients 40 --pool-size 5 --max-overflow 5
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=40, help="Threads simultâneas")
+    parser.add_argument("--requests", type=int, default=400, help="Total de checkouts")
+    parser.add_argument("--hold-ms", type=float, default=50, help="Tempo com a conexão em uso")
+    parser.add_argument("--pool-size", type=int, help="Sobrescreve DB_POOL_SIZE")
+    parser.add_argument("--max-overflow", type=int, help="Sobrescreve DB_MAX_OVERFLOW")
+    parser.add_argument("--pool-timeout", type=float, help="Sobrescreve DB_POOL_TIMEOUT")
+    args = parser.parse_args()
+
+    # As variáveis precisam estar definidas antes de importar app.database
+    for name, value in (("DB_POOL_SIZE", args.pool_size), ("DB_MAX_OVERFLOW", args.max_overflow),
+                        ("DB_POOL_TIMEOUT", args.pool_timeout)):
+        if value is not None:
+            os.environ[name] = str(value)
+    # Os timeouts aparecem nas métricas; sem um log por evento
+    logging.getLogger("marketplace_api").setLevel(logging.CRITICAL)
+
+    from sqlalchemy import exc, text
+    from app.database import engine, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT
+    from app.pool_metrics import pool_metrics
+
+    if engine.dialect.name == "sqlite":
+        sys.exit("Use um banco servidor (PostgreSQL): o SQLite não usa o pool instrumentado.")
+
+    hold_seconds = args.hold_ms / 1000
+
+    def work(_):
+        started = time.perf_counter()
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+                time.sleep(hold_seconds)
+        except exc.TimeoutError:
+            return "timeout", time.perf_counter() - started
+        return "ok", time.perf_counter() - started
+
+    engine.dispose()
+    pool_metrics.reset()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        results = list(pool.map(work, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    outcomes = Counter(status for status, _ in results)
+    latencies = sorted(latency for _, latency in results)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+
+    print(f"Pool: size={DB_POOL_SIZE} max_overflow={DB_MAX_OVERFLOW} timeout={DB_POOL_TIMEOUT}s | "
+          f"{args.clients} clientes, {args.requests} checkouts de {args.hold_ms:.0f}ms")
+    print(f"Tempo total {elapsed:.2f}s ({args.requests / elapsed:.1f}/s) | latência p95 {p95:.1f}ms | {dict(outcomes)}")
+    print(json.dumps(pool_metrics.snapshot(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
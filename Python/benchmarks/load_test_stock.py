@@ -0,0 +1,100 @@
+"""
+Teste de carga de estoque: muitos clientes comprando os mesmos produtos.
+
+Cria (via API, como uma ONG) dois produtos com estoque conhecido e dispara
+pedidos concorrentes em /public/orders. Metade dos pedidos leva [A, B] e a
+outra metade [B, A], para provocar ordens de lock opostas. Ao final verifica:
+- nenhum overselling: vendidos == estoque inicial - estoque final, e estoque >= 0;
+- nenhum deadlock/erro: só respostas 201 ou 409.
+Sai com código 1 se alguma verificação falhar.
+
+Uso (a partir da pasta Python/, com a API rodando):
+    python -m benchmarks.load_test_stock --base-url http://localhost:8000 \\
+        --stock 100 --orders 1000 --clients 50
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def login(base_url: str, email: str, password: str) -> dict:
+    response = requests.post(f"{base_url}/auth/login", data={"username": email, "password": password}, timeout=10)
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def create_product(base_url: str, headers: dict, name: str, stock: int) -> int:
+    payload = {
+        "name": name, "description": "Produto do teste de carga", "price": "1.00",
+        "category": "Teste de Carga", "stock_qty": stock, "weight_grams": 1,
+    }
+    response = requests.post(f"{base_url}/products/", json=payload, headers=headers, timeout=10)
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+def get_stock(base_url: str, headers: dict, product_id: int) -> int:
+    response = requests.get(f"{base_url}/products/{product_id}", headers=headers, timeout=10)
+    response.raise_for_status()
+    return response.json()["stock_qty"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="admin@artesaosdobem.org")
+    parser.add_argument("--password", default="senha123")
+    parser.add_argument("--stock", type=int, default=100, help="Estoque inicial de cada produto")
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--clients", type=int, default=50, help="Requisições simultâneas")
+    args = parser.parse_args()
+
+    headers = login(args.base_url, args.email, args.password)
+    suffix = int(time.time())
+    product_a = create_product(args.base_url, headers, f"Carga A {suffix}", args.stock)
+    product_b = create_product(args.base_url, headers, f"Carga B {suffix}", args.stock)
+
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.clients))
+
+    def place_order(i: int) -> int:
+        first, second = (product_a, product_b) if i % 2 == 0 else (product_b, product_a)
+        items = [{"product_id": first, "quantity": 1}, {"product_id": second, "quantity": 1}]
+        return session.post(f"{args.base_url}/public/orders", json={"items": items}, timeout=30).status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        statuses = Counter(pool.map(place_order, range(args.orders)))
+    elapsed = time.perf_counter() - started
+
+    final_a = get_stock(args.base_url, headers, product_a)
+    final_b = get_stock(args.base_url, headers, product_b)
+    sold = statuses[201]
+
+    print(f"{args.orders} pedidos em {elapsed:.2f}s ({args.orders / elapsed:.1f}/s) com {args.clients} clientes")
+    print(f"Status: {dict(statuses)}")
+    print(f"Estoque final: A={final_a} B={final_b} (inicial {args.stock}, vendidos {sold})")
+
+    failures = []
+    if final_a < 0 or final_b < 0:
+        failures.append("estoque negativo")
+    if args.stock - final_a != sold or args.stock - final_b != sold:
+        failures.append("estoque baixado não corresponde aos pedidos aceitos (overselling)")
+    if sold != min(args.stock, args.orders):
+        failures.append(f"esperados {min(args.stock, args.orders)} pedidos aceitos")
+    unexpected = {code: n for code, n in statuses.items() if code not in (201, 409)}
+    if unexpected:
+        failures.append(f"respostas inesperadas (erro/deadlock?): {unexpected}")
+
+    if failures:
+        print("FALHOU: " + "; ".join(failures))
+        sys.exit(1)
+    print("OK: sem overselling e sem deadlock.")
+
+
+if __name__ == "__main__":
+    main()
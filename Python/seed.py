@@ -1,16 +1,58 @@
-import requests
+"""
+Popula o banco.
+
+Sem argumentos: as duas ONGs de demonstração, com usuários e produtos.
+Com --synthetic: catálogo e histórico de pedidos sintéticos em escala de
+produção (milhões de linhas), determinístico para um mesmo --seed. No
+PostgreSQL as linhas vão por COPY em lotes; nos outros bancos (SQLite), por
+executemany em lotes.
+
+Uso (a partir da pasta Python/):
+    python seed.py
+    python seed.py --synthetic --orgs 200 --users 400 --products 1000000 --orders 2000000 --seed 42
+"""
+import os
+import io
+import csv
+import time
+import random
+import argparse
 import logging
-from sqlalchemy.orm import sessionmaker
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import OperationalError
 from app.database import engine, Base, SessionLocal
-from app.models import Organization, User, Product
+from app.models import Organization, User, Product, Order, OrderItem
+from app import sales_rollup
 from app.security import get_password_hash
-from decimal import Decimal
-import time
 import sys
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Tempo máximo esperando o banco aceitar conexões
+SEED_DB_WAIT_SECONDS = float(os.getenv("SEED_DB_WAIT_SECONDS", 60))
+
+def wait_for_database(timeout_seconds: float = SEED_DB_WAIT_SECONDS) -> bool:
+    """ Tenta um SELECT 1 até o banco responder (em vez de um sleep fixo). """
+    deadline = time.monotonic() + timeout_seconds
+    delay = 0.25
+    while True:
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except OperationalError as e:
+            if time.monotonic() >= deadline:
+                logger.error(f"Banco não respondeu em {timeout_seconds:.0f}s: {e}")
+                return False
+            logger.info(f"Banco ainda não está pronto; nova tentativa em {delay:.2f}s")
+            time.sleep(delay)
+            delay = min(delay * 2, 2.0)
+
 def create_tables():
     """Cria todas as tabelas se não existirem"""
     try:
@@ -46,7 +88,7 @@ def seed_data():
             db.add(org1)
             db.flush()
             logger.info(f"Criada ONG: {org1.name}")
-            
+
             # Usuário da ONG 1
             user1 = User(
                 email="admin@artesaosdobem.org",
@@ -100,14 +142,234 @@ def seed_data():
     finally:
         db.close()
 
+# --- Seed sintético em escala ---
+
+# Categoria -> (itens, faixa de preço em reais, faixa de peso em gramas)
+SYNTHETIC_CATEGORIES = {
+    "Decoração": (["Vaso", "Quadro", "Luminária", "Almofada", "Cesto", "Porta-retrato"], (15, 250), (150, 2500)),
+    "Acessórios": (["Bolsa", "Colar", "Pulseira", "Brinco", "Chaveiro", "Carteira"], (8, 180), (20, 600)),
+    "Alimentos": (["Geleia", "Café", "Mel", "Biscoito", "Granola", "Chocolate"], (6, 80), (100, 1000)),
+    "Vestuário": (["Camiseta", "Boné", "Ecobag", "Meia", "Avental", "Lenço"], (15, 150), (50, 500)),
+    "Papelaria": (["Caderno", "Agenda", "Marca-página", "Cartão", "Bloco"], (4, 60), (20, 400)),
+    "Brinquedos": (["Boneca", "Carrinho", "Quebra-cabeça", "Pião", "Móbile"], (10, 120), (50, 900)),
+}
+SYNTHETIC_MATERIALS = ["de Cerâmica", "de Palha", "de Madeira", "de Algodão", "de Sementes", "de Juta",
+                       "de Bambu", "Reciclado", "Orgânico", "de Tecido"]
+SYNTHETIC_STYLES = ["Artesanal", "Rústico", "Colorido", "Bordado", "Natural", "Sustentável", "Clássico", "Regional"]
+SYNTHETIC_DESCRIPTIONS = [
+    "Feito à mão por artesãos locais.",
+    "Produzido por voluntários da ONG.",
+    "Renda revertida para projetos sociais.",
+    "Material de origem sustentável.",
+    "Peça única, pode variar levemente.",
+    "Produção em pequena escala, sem conservantes.",
+]
+# Último dia do histórico de pedidos sintéticos (fixo: mesmo --seed, mesmas datas)
+SYNTHETIC_UNTIL = date(2026, 1, 1)
+# Distribuição de itens por pedido (1 a 5)
+ITEMS_PER_ORDER = [1, 2, 3, 4, 5]
+ITEMS_PER_ORDER_WEIGHTS = [45, 25, 15, 10, 5]
+
+Row = Tuple
+
+class BulkWriter:
+    """
+    Insere linhas em lotes: COPY ... FROM STDIN (CSV) no PostgreSQL,
+    executemany nos demais bancos. Cada tabela é gravada numa transação.
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self.use_copy = engine.dialect.name == "postgresql"
+
+    def write(self, table, columns: Sequence[str], rows: Iterable[Row]) -> int:
+        return self.write_related([(table, columns)], ((batch,) for batch in _batches(rows, self.batch_size)))[0]
+
+    def write_related(self, tables: Sequence[Tuple], batches: Iterable[Sequence[List[Row]]]) -> List[int]:
+        """
+        Grava tabelas relacionadas na mesma transação: cada lote traz uma
+        lista de linhas por tabela de 'tables' ((tabela, colunas)), na ordem
+        das chaves estrangeiras (ex: pedidos antes dos itens).
+        """
+        started = time.perf_counter()
+        totals = [0] * len(tables)
+        with engine.begin() as conn:
+            for batch in batches:
+                for position, ((table, columns), rows) in enumerate(zip(tables, batch)):
+                    if not rows:
+                        continue
+                    if self.use_copy:
+                        self._copy(conn, table, columns, rows)
+                    else:
+                        conn.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+                    totals[position] += len(rows)
+        elapsed = time.perf_counter() - started
+        for (table, _), total in zip(tables, totals):
+            logger.info(f"{table.name}: {total} linhas em {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} linhas/s)")
+        return totals
+
+    @staticmethod
+    def _copy(conn, table, columns: Sequence[str], batch: List[Row]) -> None:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)  # None -> campo vazio sem aspas = NULL no CSV do COPY
+        buffer.seek(0)
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+
+def _batches(rows: Iterable[Row], size: int) -> Iterator[List[Row]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _next_id(model) -> int:
+    with engine.connect() as conn:
+        return (conn.execute(select(func.coalesce(func.max(model.id), 0))).scalar_one()) + 1
+
+def _reset_sequences(models) -> None:
+    """ Após o COPY com ids explícitos, alinha as sequências do PostgreSQL ao MAX(id). """
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for model in models:
+            table = model.__tablename__
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+            ))
+            conn.execute(text(f"ANALYZE {table}"))
+
+def seed_synthetic(args) -> None:
+    """
+    Gera ONGs, usuários, produtos e pedidos com ids explícitos (continuando
+    do MAX(id) atual), em streaming: só preço e ONG de cada produto ficam em
+    memória, para montar os itens dos pedidos.
+    """
+    rng = random.Random(args.seed)
+    org_prefix = f"ONG Sintética {args.seed}-"
+    with SessionLocal() as db:
+        if db.query(Organization.id).filter(Organization.name == f"{org_prefix}1").first():
+            logger.info(f"Dados sintéticos do seed {args.seed} já existem. Seed não será executado.")
+            return
+
+    writer = BulkWriter(args.batch_size)
+    started = time.perf_counter()
+
+    # ONGs
+    first_org = _next_id(Organization)
+    org_ids = list(range(first_org, first_org + args.orgs))
+    writer.write(Organization.__table__, ("id", "name"),
+                 ((org_id, f"{org_prefix}{n}") for n, org_id in enumerate(org_ids, start=1)))
+
+    # Usuários: uma única chamada ao bcrypt, o mesmo hash para todos
+    hashed_password = get_password_hash(args.password)
+    first_user = _next_id(User)
+    writer.write(User.__table__, ("id", "email", "hashed_password", "organization_id"), (
+        (user_id, f"usuario{user_id}@ong{org_ids[n % len(org_ids)]}.seed.org", hashed_password, org_ids[n % len(org_ids)])
+        for n, user_id in enumerate(range(first_user, first_user + args.users))
+    ))
+
+    # Produtos: ONGs com tamanhos desiguais (poucas ONGs grandes, muitas pequenas)
+    first_product = _next_id(Product)
+    product_prices: List[Decimal] = []
+    product_orgs: List[int] = []
+    categories = list(SYNTHETIC_CATEGORIES.items())
+
+    def product_rows() -> Iterator[Row]:
+        for product_id in range(first_product, first_product + args.products):
+            category, (items, (price_min, price_max), (weight_min, weight_max)) = rng.choice(categories)
+            org_id = org_ids[int(len(org_ids) * rng.random() ** 2)]
+            cents = int(rng.triangular(price_min, price_max, price_min + (price_max - price_min) * 0.3) * 100)
+            price = Decimal(cents).scaleb(-2)
+            product_prices.append(price)
+            product_orgs.append(org_id)
+            name = f"{rng.choice(items)} {rng.choice(SYNTHETIC_MATERIALS)} {rng.choice(SYNTHETIC_STYLES)}"
+            yield (
+                product_id, name, rng.choice(SYNTHETIC_DESCRIPTIONS), price, category,
+                f"https://placehold.co/600x400?text=Produto+{product_id}",
+                rng.randint(0, 500), rng.randint(weight_min, weight_max), org_id,
+            )
+
+    writer.write(Product.__table__, ("id", "name", "description", "price", "category", "image_url",
+                                     "stock_qty", "weight_grams", "organization_id"), product_rows())
+
+    # Pedidos nos --days dias até --until, em ordem cronológica (ids crescem com a data),
+    # cada um gerado junto com os seus itens: em memória só o lote atual.
+    # Produtos populares concentram as vendas (índice sorteado com viés para o início).
+    if args.orders and args.products:
+        first_order = _next_id(Order)
+        first_item = _next_id(OrderItem)
+        end = datetime.combine(args.until + timedelta(days=1), datetime.min.time(), timezone.utc) - timedelta(microseconds=1)
+        mean_gap = args.days * 86400 / args.orders
+
+        def order_batches() -> Iterator[Tuple[List[Row], List[Row]]]:
+            orders: List[Row] = []
+            items: List[Row] = []
+            moment = end - timedelta(days=args.days)
+            item_id = first_item
+            count = len(product_prices)
+            for order_id in range(first_order, first_order + args.orders):
+                moment += timedelta(seconds=rng.expovariate(1 / mean_gap))
+                orders.append((order_id, min(moment, end)))
+                size = rng.choices(ITEMS_PER_ORDER, ITEMS_PER_ORDER_WEIGHTS)[0]
+                chosen = {int(count * rng.random() ** 3) for _ in range(size)}
+                for index in sorted(chosen):
+                    items.append((item_id, order_id, first_product + index, rng.randint(1, 3),
+                                  product_prices[index], product_orgs[index]))
+                    item_id += 1
+                if len(orders) >= args.batch_size:
+                    yield orders, items
+                    orders, items = [], []
+            if orders:
+                yield orders, items
+
+        writer.write_related([
+            (Order.__table__, ("id", "created_at")),
+            (OrderItem.__table__, ("id", "order_id", "product_id", "quantity", "price_at_purchase", "organization_id")),
+        ], order_batches())
+
+        # Os pedidos não passaram pelo create_order: recalcula o resumo do painel
+        sales_rollup.rebuild()
+
+    _reset_sequences([Organization, User, Product, Order, OrderItem])
+    logger.info(f"Seed sintético concluído em {time.perf_counter() - started:.1f}s "
+                f"(senha dos usuários: '{args.password}')")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", action="store_true", help="Gera dados sintéticos em escala")
+    parser.add_argument("--orgs", type=int, default=50)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--days", type=int, default=365, help="Período coberto pelo histórico de pedidos")
+    parser.add_argument("--until", type=date.fromisoformat, default=SYNTHETIC_UNTIL,
+                        help=f"Último dia (UTC, AAAA-MM-DD) do histórico de pedidos (padrão: {SYNTHETIC_UNTIL})")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do gerador (mesma semente, mesmos dados)")
+    parser.add_argument("--password", default="senha123", help="Senha de todos os usuários sintéticos")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
     logger.info("Aguardando banco de dados...")
-    time.sleep(10)  # Aumenta o tempo de espera
-    
+    if not wait_for_database():
+        sys.exit(1)
+
     # Primeiro cria as tabelas
     if create_tables():
         # Depois popula os dados
-        seed_data()
+        if args.synthetic:
+            seed_synthetic(args)
+        else:
+            seed_data()
     else:
         logger.error("Falha ao criar tabelas. Saindo.")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -0,0 +1,24 @@
+"""
+Configuração comum dos testes: sem DATABASE_URL no ambiente, os testes que
+usam o banco rodam num SQLite temporário (definido antes de importar app.database).
+"""
+import os
+import asyncio
+import tempfile
+
+import pytest
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'tests.db')}")
+
+
+@pytest.fixture
+def db_tables():
+    """ Tabelas criadas para o teste e removidas ao final. """
+    from app.database import Base, engine, async_engine
+    from app import models  # noqa: F401 (registra as tabelas no Base)
+
+    Base.metadata.create_all(bind=engine)
+    yield
+    # Cada asyncio.run abre um loop novo: as conexões do pool async não podem ser reaproveitadas
+    asyncio.run(async_engine.dispose())
+    Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,135 @@
+"""
+Testes do circuit breaker da Busca AI (app/circuit_breaker.py).
+
+Uso (a partir da pasta Python/):
+    python -m pytest tests
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app import ai_search, circuit_breaker
+from app.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    # Só o relógio do breaker: o event loop do asyncio continua com o real
+    monkeypatch.setattr(circuit_breaker, "time", SimpleNamespace(monotonic=fake))
+    return fake
+
+
+def make_breaker() -> CircuitBreaker:
+    return CircuitBreaker(name="teste", max_timeout=3.0, min_timeout=0.5, window_seconds=30,
+                          min_calls=10, failure_rate_threshold=0.5, open_seconds=15)
+
+
+def call(breaker: CircuitBreaker, latency: float) -> bool:
+    """ Simula uma chamada ao serviço com a latência dada; True se respondeu a tempo. """
+    if not breaker.allow_request():
+        return False
+    timeout = breaker.current_timeout()
+    if latency > timeout:
+        breaker.record_failure(latency_seconds=timeout)
+        return False
+    breaker.record_success(latency)
+    return True
+
+
+def test_closes_again_when_latency_rises_above_learned_p99(clock):
+    breaker = make_breaker()
+    for _ in range(50):
+        assert call(breaker, 0.3)
+    assert breaker.current_timeout() == 0.5
+
+    # Uma queda abre o circuito; o serviço volta mais lento (0.8s), ainda
+    # abaixo do teto de 3s, mas acima do p99 aprendido
+    clock.now += breaker.window_seconds + 1
+    open_breaker(breaker, clock)
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert breaker.current_timeout() == breaker.max_timeout  # A chamada de teste usa o teto
+    breaker.record_success(0.8)
+    assert breaker.state == CLOSED
+
+    for _ in range(20):
+        assert call(breaker, 0.8)
+        clock.now += 0.1
+    assert breaker.state == CLOSED
+
+
+def test_timeouts_let_the_timeout_catch_up_with_slower_latency(clock):
+    breaker = make_breaker()
+    for _ in range(50):
+        assert call(breaker, 0.3)
+
+    # Sem queda: os primeiros timeouts viram amostras e o limite cresce até 0.8s caber
+    results = [call(breaker, 0.8) for _ in range(10)]
+    assert not results[0]
+    assert all(results[3:])
+    assert breaker.state == CLOSED
+
+
+def test_timeouts_grow_the_adaptive_timeout(clock):
+    breaker = make_breaker()
+    for _ in range(50):
+        breaker.record_success(0.3)
+    learned = breaker.current_timeout()
+    breaker.record_failure(latency_seconds=learned)
+    assert breaker.current_timeout() > learned
+
+
+def open_breaker(breaker: CircuitBreaker, clock: FakeClock) -> None:
+    for _ in range(breaker.min_calls):
+        breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    clock.now += breaker.open_seconds
+
+
+def test_cancelled_probe_releases_half_open(clock):
+    breaker = make_breaker()
+    open_breaker(breaker, clock)
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # Só uma chamada de teste por vez
+
+    breaker.record_cancelled()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    breaker.record_success(0.2)
+    assert breaker.state == CLOSED
+
+
+class SlowModel:
+    async def generate_content_async(self, prompt, request_options=None):
+        await asyncio.sleep(10)
+
+
+def test_cancelled_async_probe_lets_the_next_call_probe(clock, monkeypatch):
+    breaker = make_breaker()
+    monkeypatch.setattr(ai_search, "ai_circuit", breaker)
+    monkeypatch.setattr(ai_search, "genai", SimpleNamespace())
+    monkeypatch.setattr(ai_search, "_get_model", lambda: SlowModel())
+    open_breaker(breaker, clock)
+
+    async def cancel_probe():
+        task = asyncio.ensure_future(ai_search._parse_with_llm_async("doces até 50"))
+        await asyncio.sleep(0.01)
+        assert breaker.state == HALF_OPEN
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_probe())
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
@@ -0,0 +1,86 @@
+"""
+Testes da paginação por cursor (app/pagination.py) e dos ETags do catálogo
+público (app/catalog_cache.py).
+
+Uso (a partir da pasta Python/):
+    python -m pytest tests
+"""
+import json
+import base64
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app import catalog_cache, crud, models, pagination
+from app.database import SessionLocal
+
+
+def raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor, sort", [
+    ("não-é-base64!", "price"),
+    (base64.urlsafe_b64encode(b"not json").decode(), "price"),
+    (raw_cursor([1, 2]), "price"),
+    (raw_cursor({"s": "price", "i": 3}), "price"),             # Sem a chave de ordenação
+    (raw_cursor({"s": "price", "k": "barato", "i": 3}), "price"),
+    (raw_cursor({"s": "price", "k": "10.00", "i": "x"}), "price"),
+    (raw_cursor({"s": "price", "k": "10.00", "i": 3}), "-price"),  # Cursor de outra ordenação
+    (raw_cursor({"s": "relevance", "k": None, "i": 3}), "relevance"),
+])
+def test_bad_cursor_rejected(cursor, sort):
+    with pytest.raises(HTTPException) as error:
+        pagination.decode_cursor(cursor, sort)
+    assert error.value.status_code == 400
+
+
+def test_cursor_round_trip():
+    product = models.Product(id=7, price=Decimal("19.90"))
+    assert pagination.decode_cursor(pagination.encode_cursor("-price", product), "-price") == (Decimal("19.90"), 7)
+    assert pagination.decode_cursor(pagination.encode_cursor("id", product), "id") == (None, 7)
+
+
+def test_price_desc_pages_with_ties(db_tables):
+    prices = ["10.00", "25.00", "10.00", "25.00", "10.00", "5.00", "25.00"]
+    with SessionLocal() as db:
+        org = models.Organization(name="ONG Catálogo")
+        db.add(org)
+        db.flush()
+        db.add_all([models.Product(name=f"Produto {n}", price=Decimal(price), category="Decoração",
+                                   stock_qty=1, weight_grams=100, organization_id=org.id)
+                    for n, price in enumerate(prices)])
+        db.commit()
+
+        expected = [(product.price, product.id) for product in
+                    db.query(models.Product).order_by(models.Product.price.desc(), models.Product.id.desc())]
+        seen, cursor = [], None
+        while True:
+            page = crud.get_public_products(db, limit=2, sort="-price", cursor=cursor)
+            seen.extend((product.price, product.id) for product in page)
+            cursor = pagination.next_cursor(page, "-price", 2)
+            if cursor is None:
+                break
+
+    # Preços repetidos: o id desempata, sem pular nem repetir produtos entre páginas
+    assert seen == expected
+    assert len(seen) == len(prices)
+
+
+ETAG = catalog_cache.make_etag(b"[]")
+
+
+@pytest.mark.parametrize("if_none_match, matches", [
+    (None, False),
+    ("", False),
+    (ETAG, True),
+    ("*", True),
+    (f"W/{ETAG}", True),
+    (f'"outro", W/{ETAG}', True),
+    (f'"outro" , *', True),
+    ('"outro", W/"mais um"', False),
+    (ETAG.strip('"'), False),  # Sem aspas não é o mesmo ETag
+])
+def test_etag_matches(if_none_match, matches):
+    assert catalog_cache.etag_matches(if_none_match, ETAG) is matches
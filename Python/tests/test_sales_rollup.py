@@ -0,0 +1,58 @@
+"""
+Testes do resumo de vendas (app/sales_rollup.py): o create_order mantém
+product_sales_daily em dia, a conferência aponta divergências e o rebuild
+as corrige.
+
+Uso (a partir da pasta Python/):
+    python -m pytest tests
+"""
+import asyncio
+from decimal import Decimal
+
+from sqlalchemy import update
+
+from app import crud, models, sales_rollup, schemas
+from app.database import AsyncSessionLocal, SessionLocal
+
+
+def create_catalog():
+    with SessionLocal() as db:
+        org = models.Organization(name="ONG Painel")
+        db.add(org)
+        db.flush()
+        products = [
+            models.Product(name=name, price=Decimal(price), category="Alimentos", stock_qty=100,
+                           weight_grams=100, organization_id=org.id)
+            for name, price in (("Geleia", "25.00"), ("Café", "55.00"))
+        ]
+        db.add_all(products)
+        db.commit()
+        return org.id, [product.id for product in products]
+
+
+def create_orders(orders):
+    async def run():
+        for items in orders:
+            async with AsyncSessionLocal() as db:
+                await crud.create_order_async(db, schemas.OrderCreate(items=[
+                    schemas.OrderItemCreate(product_id=product_id, quantity=quantity) for product_id, quantity in items
+                ]))
+    asyncio.run(run())
+
+
+def test_check_and_rebuild(db_tables):
+    org_id, (jam, coffee) = create_catalog()
+    create_orders([[(jam, 2), (coffee, 1)], [(jam, 1)]])
+    assert list(sales_rollup.differences()) == []
+
+    with SessionLocal() as db:
+        day, units, revenue = db.query(models.ProductSalesDaily.day, models.ProductSalesDaily.units,
+                                       models.ProductSalesDaily.revenue).filter_by(product_id=jam).one()
+        assert (units, revenue) == (3, Decimal("75.00"))
+        db.execute(update(models.ProductSalesDaily).where(models.ProductSalesDaily.product_id == jam).values(units=10))
+        db.commit()
+
+    assert list(sales_rollup.differences(org_id)) == [((org_id, day, jam), (3, Decimal("75.00")), (10, Decimal("75.00")))]
+
+    assert sales_rollup.rebuild(org_id) == 2
+    assert list(sales_rollup.differences()) == []
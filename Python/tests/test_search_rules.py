@@ -0,0 +1,55 @@
+"""
+Testes do pré-parser da Busca AI (app/search_rules.py): o que é resolvido
+sem o LLM e o que precisa ir para ele (None).
+
+Uso (a partir da pasta Python/):
+    python -m pytest tests
+"""
+import pytest
+
+from app.search_rules import parse_simple_query
+
+CATEGORIES = ["Alimentos", "Decoração", "Acessórios"]
+
+
+@pytest.mark.parametrize("query, expected", [
+    # Faixas de preço
+    ("entre 20 e 50", {"price_min": 20, "price_max": 50}),
+    ("entre 50 e 20", {"price_min": 20, "price_max": 50}),
+    ("de R$ 10 a 30", {"price_min": 10, "price_max": 30}),
+    ("de 10 até 30 reais", {"price_min": 10, "price_max": 30}),
+    # Formas de moeda
+    ("até R$ 49,90", {"price_max": 49.9}),
+    ("acima de 1.234,50 reais", {"price_min": 1234.5}),
+    ("abaixo de r$50", {"price_max": 50}),
+    ("a partir de 1.000 reais", {"price_min": 1000}),
+    # Número sem marcador, sem substantivo depois: é preço
+    ("chocolate até 50", {"price_max": 50, "keywords": "chocolate"}),
+    ("até 50 reais de chocolate", {"price_max": 50, "keywords": "chocolate"}),
+    # Categoria conhecida (sem acento, singular/plural)
+    ("Alimentos", {"category": "Alimentos"}),
+    ("decoracao", {"category": "Decoração"}),
+    ("acessório", {"category": "Acessórios"}),
+    ("alimentos até 30", {"price_max": 30, "category": "Alimentos"}),
+    # Uma palavra-chave
+    ("velas", {"keywords": "velas"}),
+])
+def test_resolved_without_llm(query, expected):
+    assert parse_simple_query(query, CATEGORIES) == expected
+
+
+@pytest.mark.parametrize("query", [
+    "",
+    "   ",
+    "alimentos orgânicos",  # Duas palavras sem categoria exata
+    "chocolate 50",         # Número solto
+    "mais de 3 cores",      # Número seguido de substantivo: não é preço
+    "até 2 anos",
+    "de 3 a 5 anos",
+    "até 50 chocolate",
+    "até",                  # Só a preposição de preço
+    "1.000",
+    "R$ 49,90",             # Preço sem 'até'/'acima de': exato? mínimo? o LLM decide
+])
+def test_escalated_to_llm(query):
+    assert parse_simple_query(query, CATEGORIES) is None